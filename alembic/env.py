@@ -9,7 +9,7 @@ from alembic import context
 # add current path to PYTHONPATH, otherwise app module will not be found when alembic executing
 sys.path.append(os.getcwd())
 
-from models import database, order, product
+from models import database, job, order, product, sync
 from conf.config import settings
 
 # this is the Alembic Config object, which provides
@@ -30,7 +30,7 @@ fileConfig(config.config_file_name)
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-target_metadata = [order.metadata, product.metadata]
+target_metadata = [job.metadata, order.metadata, product.metadata, sync.metadata]
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -0,0 +1,28 @@
+"""Order id sequence
+
+Revision ID: 3d9a7e41b2c8
+Revises: 8b1f0c2d4e5a
+Create Date: 2026-10-17 12:41:09.774520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d9a7e41b2c8'
+down_revision = '8b1f0c2d4e5a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('order_id_seq', increment=1000)))
+    op.drop_index('ix_orders_order_id', table_name='orders')
+    op.create_index(op.f('ix_orders_order_id'), 'orders', ['order_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_orders_order_id'), table_name='orders')
+    op.create_index(op.f('ix_orders_order_id'), 'orders', ['order_id'], unique=False)
+    op.execute(sa.schema.DropSequence(sa.Sequence('order_id_seq')))
@@ -1,4 +1,3 @@
-import uvicorn
 from fastapi import FastAPI
 from fastapi import Request
 from fastapi import status
@@ -6,23 +5,47 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
-from models.database import database
+from conf.config import settings
+from models.database import database, pool_stats
 from routers import order_cycle, jobs
+from services.depots import get_depot_index
+from services.http_client import http_client
+from services.load_shedding import LoadSheddingMiddleware, retry_after
+from services.log import RequestContextMiddleware, setup_logging
+from services.metrics import MetricsMiddleware, instrument_database, metrics_endpoint
+from services.order_simulator import order_simulator
+from services.product_cache import product_cache
+
+setup_logging(settings.log_level)
 
 app = FastAPI(
     title='B2B Api stub',
     description='This stub is designed to test the functionality '
                 'of sending messages for integration with yango'
 )
+app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
+app.add_route('/metrics', metrics_endpoint, include_in_schema=False)
+instrument_database(database)
 
 
 @app.on_event("startup")
 async def startup():
     await database.connect()
+    pool_stats.attach(database)
+    await http_client.start()
+    get_depot_index()
+    product_cache.start()
+    if settings.simulator_enabled:
+        order_simulator.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    await order_simulator.stop()
+    await http_client.close()
+    await product_cache.close()
     await database.disconnect()
 
 
@@ -32,10 +55,11 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         status_code=status.HTTP_400_BAD_REQUEST,
         content=jsonable_encoder({
             "code": "bad_request",
-            "message": exc.raw_errors if exc.raw_errors else str(exc.errors()),
+            # raw_errors is a plain string only for errors raised by hand, like a wrong token
+            "message": exc.raw_errors if isinstance(exc.raw_errors, str) else str(exc.errors()),
             "details": {
                 "cart": None,
-                "retry_after": 5
+                "retry_after": retry_after(request.scope)
             }})
     )
 
@@ -49,4 +73,6 @@ app.include_router(
     tags=["Jobs"],
 )
 if __name__ == '__main__':
-    uvicorn.run('app:app')
+    import uvicorn
+
+    uvicorn.run('app:app', loop='uvloop', http='httptools')
@@ -0,0 +1,49 @@
+"""
+Minimal in-process ASGI client, requests never touch a socket
+"""
+import json
+
+
+async def call(app, method: str, path: str, body=None, headers=None):
+    """
+    Returns (status, decoded json body or raw bytes)
+    """
+    payload = b'' if body is None else json.dumps(body).encode()
+    raw_headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': raw_headers,
+        'client': ('127.0.0.1', 12345),
+        'server': ('testserver', 80),
+    }
+    sent = False
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {'type': 'http.disconnect'}
+        sent = True
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    await app(scope, receive, send)
+    content = b''.join(response['body'])
+    try:
+        return response['status'], json.loads(content)
+    except ValueError:
+        return response['status'], content
@@ -0,0 +1,60 @@
+"""
+Cost of the cart catalog check and repricing for a 200-item cart, with the
+product cache warm and with it off (one ANY query per cart). The budget is 1ms.
+
+Runs against the scratch database from BENCHMARK_DB_NAME (see
+benchmarks/scratch_db.py), the products table is truncated and seeded:
+
+    BENCHMARK_DB_NAME=stub_bench python -m benchmarks.cart_pricing --items 200 --runs 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import scratch_db  # noqa: F401, switches to the scratch database
+from benchmarks.payloads import request_order
+from models.database import database
+from routers.jobs import product_row, upsert_products
+from services import cart_pricing
+from services.cart_pricing import known_items, price_cart
+from services.product_cache import ProductCache
+from shemas.shemas_order_cycle import RequestOrder
+
+
+async def measure(name, cart, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        price_cart(cart, await known_items([cart]))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f'{name:<10} mean {statistics.mean(timings) * 1e3:7.3f}ms p99 {timings[int(len(timings) * 0.99)] * 1e3:7.3f}ms')
+
+
+async def main(items, runs):
+    order = RequestOrder.parse_obj(request_order(items))
+    await database.connect()
+    try:
+        await database.execute('TRUNCATE products')
+        await upsert_products([
+            product_row({'product_id': f'p{i}', 'external_id': item.id})
+            for i, item in enumerate(order.cart.items)
+        ])
+        cart_pricing.product_cache = ProductCache(0)
+        await measure('cache off', order.cart, runs)
+        cart_pricing.product_cache = cache = ProductCache(100000)
+        await cache.listen()
+        await measure('cache on', order.cart, runs)
+        await cache.close()
+        await database.execute('TRUNCATE products')
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.runs))
@@ -0,0 +1,51 @@
+"""
+Nearest-depot lookups for /order/state sized batches of orders: the k-d tree
+walk, the vectorized scan and DepotIndex.nearest, which picks one of them by
+registry size (SCAN_MAX_DEPOTS):
+
+    python -m benchmarks.depots --depots 100 1000 10000 50000 --orders 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services.depot_index import DepotIndex, unit_vectors
+
+
+def main(depot_counts, orders, seed):
+    rng = np.random.default_rng(seed)
+    # depots and orders around one city, like a real registry
+    for count in depot_counts:
+        lat, lon = rng.normal(24.7, 0.3, count), rng.normal(46.7, 0.3, count)
+        started = time.perf_counter()
+        index = DepotIndex([str(i) for i in range(count)], lat, lon)
+        built = time.perf_counter() - started
+        qlat, qlon = rng.normal(24.7, 0.3, orders), rng.normal(46.7, 0.3, orders)
+
+        queries = unit_vectors(qlat, qlon)
+        timings = {}
+        found = {}
+        for name, func in (
+            ('k-d tree', lambda: np.array([index._nearest(point) for point in queries.tolist()])),
+            ('scan', lambda: index._scan(queries)),
+            ('nearest', lambda: index.nearest(qlat, qlon)),
+        ):
+            started = time.perf_counter()
+            found[name] = func()
+            timings[name] = time.perf_counter() - started
+
+        assert (found['k-d tree'] == found['scan']).all() and (found['scan'] == found['nearest']).all()
+        print(
+            f'{count:>6} depots build {built * 1e3:7.1f}ms ' +
+            ' '.join(f'{name} {elapsed / orders * 1e6:7.1f}us/order' for name, elapsed in timings.items())
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depots', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    main(args.depots, args.orders, args.seed)
@@ -0,0 +1,100 @@
+"""
+Open loop load at a multiple of capacity against a route whose work is
+bounded by a fake connection pool, with and without LoadSheddingMiddleware.
+Without shedding the pool queue grows for as long as the overload lasts,
+with it p99 of admitted requests stays around limit / capacity + max wait:
+
+    python -m benchmarks.load_shedding --overload 2 --seconds 10
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from benchmarks.asgi import call
+from conf.config import settings
+from services import load_shedding
+from services.responses import PreparedJSONResponse
+
+PATH = '/lavka/bench'
+
+
+def make_app(pool: asyncio.Semaphore, service_time: float, shedding: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.post(PATH)
+    async def work():
+        async with pool:
+            await asyncio.sleep(service_time)
+        return PreparedJSONResponse(b'{}')
+
+    if shedding:
+        app.add_middleware(load_shedding.LoadSheddingMiddleware)
+    return app
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(shedding, pool_size, service_time, overload, seconds):
+    load_shedding.limiters.clear()
+    app = make_app(asyncio.Semaphore(pool_size), service_time, shedding)
+    rate = pool_size / service_time * overload
+    latencies, statuses, retry_after = [], {}, []
+
+    async def one():
+        started = time.perf_counter()
+        status, body = await call(app, 'POST', PATH)
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            retry_after.append(body['details']['retry_after'])
+
+    tasks = []
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < seconds:
+        due = int((time.perf_counter() - started) * rate)
+        for _ in range(due - sent):
+            tasks.append(asyncio.create_task(one()))
+        sent = due
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*tasks)
+    return {
+        'sent': sent,
+        'statuses': statuses,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_retry_after': max(retry_after, default=None),
+    }
+
+
+async def main(args):
+    settings.shed_prefix = '/lavka/'
+    settings.shed_default_limit = args.pool
+    settings.shed_limits = {}
+    settings.shed_max_queue = args.pool * 2
+    settings.shed_max_wait = args.max_wait
+    print(f'capacity {args.pool / args.service_time:.0f} rps, offered {args.overload}x')
+    for shedding in (False, True):
+        result = await run(shedding, args.pool, args.service_time, args.overload, args.seconds)
+        print(f"{'shedding' if shedding else 'unbounded':>10}: sent {result['sent']}"
+              f" statuses {result['statuses']} p50 {result['p50_ms']:.1f}ms"
+              f" p99 {result['p99_ms']:.1f}ms max retry_after {result['max_retry_after']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pool', type=int, default=10)
+    parser.add_argument('--service-time', type=float, default=0.01)
+    parser.add_argument('--overload', type=float, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--max-wait', type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args))
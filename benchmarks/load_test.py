@@ -0,0 +1,107 @@
+"""
+Local load test of the runtime profiles: every profile is started as a real
+gunicorn on a TCP port and the order-submit route is hammered with aiohttp,
+reports RPS and latency percentiles. Needs the database from conf.config
+(migrations applied):
+
+    python -m benchmarks.load_test --profiles default throughput --duration 30 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from benchmarks.payloads import request_order
+from conf.runtime import PROFILES
+
+SUBMIT = '/lavka/v1/integration-entry/v1/order/submit'
+
+
+async def wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f'{url}/openapi.json') as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'{url} did not start')
+
+
+async def load(url, duration, concurrency, items):
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async def client(session):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            body = request_order(items)
+            started = time.perf_counter()
+            try:
+                async with session.post(f'{url}{SUBMIT}', json=body) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.monotonic()
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return latencies, errors, time.monotonic() - started
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run_profile(profile, port, duration, concurrency, items):
+    url = f'http://127.0.0.1:{port}'
+    env = dict(
+        os.environ,
+        SERVER_PROFILE=profile,
+        SERVER_BIND=f'127.0.0.1:{port}',
+        SERVER_ERRORLOG='-',
+        LOG_LEVEL='WARNING',
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_conf.py', 'app:app'], env=env,
+    )
+    try:
+        asyncio.run(wait_ready(url))
+        # warm up every worker
+        asyncio.run(load(url, 2, concurrency, items))
+        latencies, errors, elapsed = asyncio.run(load(url, duration, concurrency, items))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+    latencies.sort()
+    print(
+        f'{profile:<12} {len(latencies) / elapsed:9.0f} rps '
+        f'p50 {percentile(latencies, 0.5) * 1000:7.1f}ms '
+        f'p99 {percentile(latencies, 0.99) * 1000:7.1f}ms '
+        f'errors {errors}'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--duration', type=int, default=30)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--items', type=int, default=10)
+    args = parser.parse_args()
+    for name in args.profiles:
+        run_profile(name, args.port, args.duration, args.concurrency, args.items)
@@ -0,0 +1,55 @@
+"""
+Per-request overhead of MetricsMiddleware, measured on an app with a single
+trivial route so the difference is the middleware alone:
+
+    python -m benchmarks.metrics_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from benchmarks.asgi import call
+from services.metrics import MetricsMiddleware
+from services.responses import PreparedJSONResponse
+
+
+def make_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.post('/ping/{item_id}')
+    async def ping(item_id: str):
+        return PreparedJSONResponse(b'{}')
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def per_request(app, requests):
+    for i in range(1000):
+        await call(app, 'POST', f'/ping/{i}')
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(app, 'POST', f'/ping/{i}')
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests, rounds):
+    bare, metered = [], []
+    for _ in range(rounds):
+        bare.append(await per_request(make_app(False), requests))
+        metered.append(await per_request(make_app(True), requests))
+    bare, metered = min(bare), min(metered)
+    print(f'without metrics {bare * 1e6:8.1f}us/request')
+    print(f'with metrics    {metered * 1e6:8.1f}us/request')
+    print(f'overhead        {(metered - bare) * 1e6:8.1f}us/request (budget 50us)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rounds))
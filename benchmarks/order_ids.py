@@ -0,0 +1,80 @@
+"""
+Concurrency check for order ids: several processes, standing in for gunicorn
+workers, submit orders in parallel and every order_id must come out unique.
+
+Runs in-process against the scratch database from BENCHMARK_DB_NAME (see
+benchmarks/scratch_db.py), the orders table is truncated first:
+
+    BENCHMARK_DB_NAME=stub_bench python -m benchmarks.order_ids --orders 100000 --workers 4 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import scratch_db  # noqa: F401, switches to the scratch database
+from benchmarks.asgi import call
+from benchmarks.payloads import request_order
+from models.database import database
+
+SUBMIT = '/lavka/v1/integration-entry/v1/order/submit'
+
+
+async def submit_orders(count, concurrency):
+    from app import app
+
+    semaphore = asyncio.Semaphore(concurrency)
+    await database.connect()
+
+    async def submit():
+        async with semaphore:
+            status, body = await call(app, 'POST', SUBMIT, request_order(1))
+            assert status == 200, body
+            return body['order_id']
+
+    try:
+        return await asyncio.gather(*(submit() for _ in range(count)))
+    finally:
+        await database.disconnect()
+
+
+def worker(count, concurrency):
+    return asyncio.run(submit_orders(count, concurrency))
+
+
+async def count_orders():
+    await database.connect()
+    try:
+        return await database.fetch_one('SELECT count(*) AS total, count(DISTINCT order_id) AS uniq FROM orders')
+    finally:
+        await database.disconnect()
+
+
+async def truncate():
+    await database.connect()
+    try:
+        await database.execute('TRUNCATE orders')
+    finally:
+        await database.disconnect()
+
+
+def main(count, workers, concurrency):
+    asyncio.run(truncate())
+    started = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        chunks = list(pool.map(worker, [count // workers] * workers, [concurrency] * workers))
+    elapsed = time.perf_counter() - started
+    ids = [order_id for chunk in chunks for order_id in chunk]
+    row = asyncio.run(count_orders())
+    print(f'{len(ids)} orders in {elapsed:.2f}s ({len(ids) / elapsed:.0f}/s), '
+          f'unique returned: {len(set(ids))}, rows: {row["total"]}, unique rows: {row["uniq"]}')
+    assert len(set(ids)) == len(ids) == row['total'] == row['uniq']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+    main(args.orders, args.workers, args.concurrency)
@@ -0,0 +1,60 @@
+"""
+Requests/sec of /order/state polling 1 to 500 known orders per request.
+
+Runs in-process against the database from conf.config (migrations applied):
+
+    python -m benchmarks.order_state --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+from app import app
+from benchmarks.asgi import call
+from benchmarks.payloads import request_order
+from models.database import database
+
+SUBMIT_BATCH = '/lavka/v1/integration-entry/v1/order/submit-batch'
+STATE = '/lavka/v1/integration-entry/v1/order/state'
+
+
+async def seed(count):
+    order_ids = []
+    for _ in range(0, count, 500):
+        status, body = await call(app, 'POST', SUBMIT_BATCH, {'orders': [request_order(1) for _ in range(500)]})
+        assert status == 200, body
+        order_ids += [result['order_id'] for result in body['results']]
+    return order_ids
+
+
+async def poll(order_ids, known, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def state(i):
+        async with semaphore:
+            start = (i * known) % (len(order_ids) - known)
+            status, body = await call(app, 'POST', STATE, {'known_orders': order_ids[start:start + known]})
+            assert status == 200 and len(body['grocery_orders']) == known, status
+
+    started = time.perf_counter()
+    await asyncio.gather(*(state(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f'known_orders={known:<4} {requests / elapsed:8.0f} req/s {requests * known / elapsed:10.0f} orders/s')
+
+
+async def main(requests, concurrency):
+    await database.connect()
+    try:
+        order_ids = await seed(5000)
+        for known in (1, 10, 50, 100, 250, 500):
+            await poll(order_ids, known, requests, concurrency)
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,69 @@
+"""
+Orders/sec through the single and the batch order-submit endpoints.
+
+Runs in-process against the database from conf.config (migrations applied):
+
+    python -m benchmarks.order_submit --orders 5000 --batch 100 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+from app import app
+from benchmarks.asgi import call
+from benchmarks.payloads import request_order
+from models.database import database
+
+SUBMIT = '/lavka/v1/integration-entry/v1/order/submit'
+SUBMIT_BATCH = '/lavka/v1/integration-entry/v1/order/submit-batch'
+
+
+async def single(orders, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(order):
+        async with semaphore:
+            status, _ = await call(app, 'POST', SUBMIT, order)
+            assert status == 200, status
+
+    await asyncio.gather(*(submit(order) for order in orders))
+
+
+async def batched(orders, batch, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(chunk):
+        async with semaphore:
+            status, body = await call(app, 'POST', SUBMIT_BATCH, {'orders': chunk})
+            assert status == 200, status
+            assert all('order_id' in result for result in body['results'])
+
+    await asyncio.gather(*(submit(orders[i:i + batch]) for i in range(0, len(orders), batch)))
+
+
+async def measure(name, coro, count):
+    started = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - started
+    print(f'{name:<24} {elapsed:8.2f}s {count / elapsed:10.0f} orders/s')
+
+
+async def main(count, batch, concurrency, items):
+    await database.connect()
+    try:
+        await measure('single', single([request_order(items) for _ in range(count)], concurrency), count)
+        await measure(f'batch of {batch}', batched(
+            [request_order(items) for _ in range(count)], batch, concurrency
+        ), count)
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--items', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.batch, args.concurrency, args.items))
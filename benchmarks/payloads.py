@@ -0,0 +1,66 @@
+"""
+Realistic request payloads for the order-cycle endpoints
+"""
+import uuid
+from decimal import Decimal
+
+
+def cart_item(i: int) -> dict:
+    return {
+        'id': f'PID{10000000 + i}',
+        'quantity': str(1 + i % 5),
+        'full_price': f'{1 + i % 50}.{i % 100:02d}',
+        'title': f'Product {i}',
+        'stack_price': f'{(1 + i % 5) * (1 + i % 50)}.00',
+        'stack_full_price': f'{(1 + i % 5) * (1 + i % 50)}.50',
+    }
+
+
+def request_order(items: int = 10, created_order_id: str = None) -> dict:
+    cart = [cart_item(i) for i in range(items)]
+    return {
+        'user_id': 'user-1',
+        'user_phone': '+966582904515',
+        'cart': {
+            'items': cart,
+            'cart_total_cost': str(sum(Decimal(item['stack_price']) for item in cart)),
+            'cart_total_discount': '0',
+            'delivery_fee': '5.00',
+        },
+        'payment_type': 'online',
+        'location': {
+            'position': {'lat': 24.7136, 'lon': 46.6753},
+            'place_id': '2018391',
+            'floor': '3',
+            'flat': '12',
+            'comment': 'Ring twice',
+        },
+        'created_order_id': created_order_id or uuid.uuid4().hex,
+    }
+
+
+def orders_state_request(known: int = 100) -> dict:
+    return {
+        'user_id': 'user-1',
+        'known_orders': [f'221017-{i:06d}' for i in range(known)],
+    }
+
+
+def cancel_order_request(order_id: str = '221017-000001') -> dict:
+    return {
+        'order_id': order_id,
+        'reason': {'type': 'user_request'},
+        'cancel_type': 'user',
+    }
+
+
+def set_payment_status(order_id: str = '221017-000001') -> dict:
+    return {
+        'order_id': order_id,
+        'payment_status': 'success',
+        'payment_type': 'online',
+    }
+
+
+def contact_obtain_request(order_id: str = '221017-000001') -> dict:
+    return {'order_id': order_id}
@@ -0,0 +1,59 @@
+"""
+Latency of product_id -> external_id lookups with the product cache on and off.
+
+Runs against the scratch database from BENCHMARK_DB_NAME (see
+benchmarks/scratch_db.py), the products table is truncated and seeded:
+
+    BENCHMARK_DB_NAME=stub_bench python -m benchmarks.product_cache --products 10000 --lookups 50000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks import scratch_db  # noqa: F401, switches to the scratch database
+from models.database import database
+from routers.jobs import product_row, upsert_products
+from services.product_cache import ProductCache
+
+
+async def measure(name, cache, keys):
+    timings = []
+    for key in keys:
+        started = time.perf_counter()
+        await cache.external_id(key)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f'{name:<10} mean {statistics.mean(timings) * 1e6:9.1f}us '
+        f'p99 {timings[int(len(timings) * 0.99)] * 1e6:9.1f}us '
+        f'{cache.stats()}'
+    )
+
+
+async def main(count, lookups, size):
+    await database.connect()
+    try:
+        await database.execute('TRUNCATE products')
+        rows = [product_row({'product_id': f'p{i}', 'external_id': f'PID{i}'}) for i in range(count)]
+        for i in range(0, count, 1000):
+            await upsert_products(rows[i:i + 1000])
+        keys = [f'p{random.randrange(count)}' for _ in range(lookups)]
+        await measure('cache off', ProductCache(0), keys)
+        cache = ProductCache(size)
+        await cache.listen()
+        await measure('cache on', cache, keys)
+        await cache.close()
+        await database.execute('TRUNCATE products')
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--lookups', type=int, default=50000)
+    parser.add_argument('--size', type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.lookups, args.size))
@@ -0,0 +1,68 @@
+"""
+Rows/sec of the WMS product sync write path: per-row INSERT loop vs batched upsert.
+
+Runs against the scratch database from BENCHMARK_DB_NAME (see
+benchmarks/scratch_db.py), the products table is truncated before every run:
+
+    BENCHMARK_DB_NAME=stub_bench python -m benchmarks.product_upsert --rows 50000 --page 500
+"""
+import argparse
+import asyncio
+import time
+
+from asyncpg.exceptions import UniqueViolationError
+
+from benchmarks import scratch_db  # noqa: F401, switches to the scratch database
+from models.database import database
+from models.product import products
+from routers.jobs import product_row, upsert_products
+
+
+def make_pages(rows, page, shift=0):
+    data = [
+        product_row({'product_id': f'p{i}', 'external_id': f'PID{i + shift}'})
+        for i in range(rows)
+    ]
+    return [data[i:i + page] for i in range(0, rows, page)]
+
+
+async def row_loop(pages):
+    for page in pages:
+        for row in page:
+            try:
+                await database.execute(products.insert().values(**row))
+            except UniqueViolationError:
+                continue
+
+
+async def batched(pages):
+    for page in pages:
+        await upsert_products(page)
+
+
+async def measure(name, func, pages, rows):
+    started = time.perf_counter()
+    await func(pages)
+    elapsed = time.perf_counter() - started
+    print(f'{name:<24} {elapsed:8.2f}s {rows / elapsed:12.0f} rows/s')
+
+
+async def main(rows, page):
+    await database.connect()
+    try:
+        for name, func in (('insert loop', row_loop), ('batched upsert', batched)):
+            await database.execute('TRUNCATE products')
+            await measure(f'{name} (fresh)', func, make_pages(rows, page), rows)
+            await measure(f'{name} (resync)', func, make_pages(rows, page), rows)
+        await measure('batched upsert (changed)', batched, make_pages(rows, page, shift=1), rows)
+        await database.execute('TRUNCATE products')
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--page', type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page))
@@ -0,0 +1,25 @@
+"""
+Micro-benchmark of RequestOrder parsing for carts of 10, 100 and 1000 items:
+
+    python -m benchmarks.request_order_parse
+"""
+import argparse
+import timeit
+
+from benchmarks.payloads import request_order
+from shemas.shemas_order_cycle import RequestOrder
+
+
+def main(repeat):
+    for items in (10, 100, 1000):
+        payload = request_order(items)
+        number = max(1, 10000 // items)
+        best = min(timeit.repeat(lambda: RequestOrder.parse_obj(payload), number=number, repeat=repeat)) / number
+        print(f'{items:>5} items {best * 1e6:10.1f}us per order {best * 1e6 / items:8.2f}us per item')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(args.repeat)
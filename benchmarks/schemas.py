@@ -0,0 +1,158 @@
+"""
+Benchmark and profiling suite for the order-cycle schemas and routes.
+
+Every schema case is timed in three phases: JSON decoding of the raw body
+(parse), pydantic validation of the decoded dict (validate) and rendering
+the model back to JSON (serialize). With --requests the same payloads go
+through the routers with the in-process ASGI client, that needs the
+database from conf.config (migrations applied).
+
+    python -m benchmarks.schemas --output bench.json
+    python -m benchmarks.schemas --baseline bench.json --threshold 0.2
+    python -m benchmarks.schemas --profile RequestOrder[1000]
+"""
+import argparse
+import asyncio
+import cProfile
+import json
+import pstats
+import sys
+import time
+
+from benchmarks import payloads
+from shemas.shemas_order_cycle import (
+    CancelOrderRequest, ContactObtainRequest, OrdersStateRequest, RequestOrder, SetPaymentStatus,
+)
+
+SCHEMA_CASES = {
+    'RequestOrder[10]': (RequestOrder, payloads.request_order(10)),
+    'RequestOrder[200]': (RequestOrder, payloads.request_order(200)),
+    'RequestOrder[1000]': (RequestOrder, payloads.request_order(1000)),
+    'OrdersStateRequest[10]': (OrdersStateRequest, payloads.orders_state_request(10)),
+    'OrdersStateRequest[500]': (OrdersStateRequest, payloads.orders_state_request(500)),
+    'CancelOrderRequest': (CancelOrderRequest, payloads.cancel_order_request()),
+    'SetPaymentStatus': (SetPaymentStatus, payloads.set_payment_status()),
+    'ContactObtainRequest': (ContactObtainRequest, payloads.contact_obtain_request()),
+}
+
+ROUTE_CASES = {
+    'POST submit[10]': ('/lavka/v1/integration-entry/v1/order/submit', lambda: payloads.request_order(10)),
+    'POST submit[200]': ('/lavka/v1/integration-entry/v1/order/submit', lambda: payloads.request_order(200)),
+    'POST state[100]': ('/lavka/v1/integration-entry/v1/order/state', lambda: payloads.orders_state_request(100)),
+    'POST cancel': ('/lavka/v1/integration-entry/v1/order/actions/cancel', payloads.cancel_order_request),
+    'POST contact/obtain': ('/lavka/v1/integration-entry/v1/order/contact/obtain', payloads.contact_obtain_request),
+    'POST set-payment-status': ('/lavka/v1/integration-entry/v1/order/set-payment-status', payloads.set_payment_status),
+}
+
+
+def summary(timings):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'mean_us': sum(timings) / len(timings) * 1e6,
+        'p50_us': timings[len(timings) // 2] * 1e6,
+        'p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6,
+    }
+
+
+def timed(func, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return summary(timings)
+
+
+def schema_phases(model, payload):
+    raw = json.dumps(payload).encode()
+    decoded = json.loads(raw)
+    parsed = model.parse_obj(decoded)
+    return {
+        'parse': lambda: json.loads(raw),
+        'validate': lambda: model.parse_obj(decoded),
+        'serialize': lambda: parsed.json(),
+    }
+
+
+def run_schemas(runs):
+    results = {}
+    for name, (model, payload) in SCHEMA_CASES.items():
+        for phase, func in schema_phases(model, payload).items():
+            results[f'{name}:{phase}'] = timed(func, runs)
+    return results
+
+
+async def run_routes(runs):
+    from app import app
+    from benchmarks.asgi import call
+    from models.database import database
+
+    results = {}
+    await database.connect()
+    try:
+        for name, (path, make_payload) in ROUTE_CASES.items():
+            timings = []
+            for _ in range(runs):
+                body = make_payload()
+                started = time.perf_counter()
+                await call(app, 'POST', path, body)
+                timings.append(time.perf_counter() - started)
+            results[name] = summary(timings)
+    finally:
+        await database.disconnect()
+    return results
+
+
+def profile(name, runs):
+    model, payload = SCHEMA_CASES[name]
+    phases = schema_phases(model, payload)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(runs):
+        for func in phases.values():
+            func()
+    profiler.disable()
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+def regressions(results, baseline, threshold):
+    failed = []
+    for name, result in results.items():
+        if name in baseline and result['p50_us'] > baseline[name]['p50_us'] * (1 + threshold):
+            failed.append(f'{name}: p50 {result["p50_us"]:.1f}us, baseline {baseline[name]["p50_us"]:.1f}us')
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--requests', action='store_true', help='also time full requests through the routers')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed p50 slowdown against the baseline')
+    parser.add_argument('--profile', choices=list(SCHEMA_CASES), help='cProfile one schema case instead')
+    args = parser.parse_args()
+
+    if args.profile:
+        profile(args.profile, args.runs)
+        return
+    results = run_schemas(args.runs)
+    if args.requests:
+        results.update(asyncio.run(run_routes(args.runs)))
+    for name, result in results.items():
+        print(f'{name:<36} p50 {result["p50_us"]:10.1f}us p99 {result["p99_us"]:10.1f}us')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failed = regressions(results, json.load(f), args.threshold)
+        for line in failed:
+            print(f'REGRESSION {line}')
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+"""
+Benchmarks that truncate and seed tables run against a scratch database
+named by BENCHMARK_DB_NAME on the configured host, never the database the
+app is configured with. Import it before anything from models, the
+database URL is built at import time. The scratch database needs the
+migrations:
+
+    DB_NAME=stub_bench alembic upgrade head
+"""
+import os
+import sys
+
+from conf.config import settings
+
+name = os.environ.get('BENCHMARK_DB_NAME')
+if not name:
+    sys.exit('Set BENCHMARK_DB_NAME to a scratch database, this benchmark truncates tables')
+if name == settings.DB_NAME:
+    sys.exit(f'BENCHMARK_DB_NAME must not be the configured database {settings.DB_NAME!r}')
+if 'models.database' in sys.modules:
+    sys.exit('benchmarks.scratch_db must be imported before models')
+settings.DB_NAME = name
@@ -0,0 +1,54 @@
+"""
+Worker cold start: time to import the app in a fresh interpreter, time to
+serve the first request and to build the OpenAPI schema, which FastAPI only
+does on the first /openapi.json request. No database is needed, the first
+request goes to a route that doesn't touch it:
+
+    python -m benchmarks.startup --runs 10
+    python -X importtime -c 'import app' 2> importtime.log   # per module breakdown
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = '''
+import asyncio, json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+from benchmarks.asgi import call
+status, _ = asyncio.run(call(
+    app.app, 'POST', '/lavka/v1/integration-entry/v1/order/contact/obtain', {'order_id': '1'}
+))
+assert status == 200, status
+first = time.perf_counter()
+status, _ = asyncio.run(call(app.app, 'GET', '/openapi.json'))
+assert status == 200, status
+openapi = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (first - started) * 1000,
+    'openapi_ms': (openapi - first) * 1000,
+}))
+'''
+
+
+def main(runs):
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    for key in ('import_ms', 'first_request_ms', 'openapi_ms'):
+        values = [result[key] for result in results]
+        print(f'{key:<18} median {statistics.median(values):8.1f} min {min(values):8.1f} max {max(values):8.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs)
@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from pydantic import BaseSettings
 from functools import lru_cache
 
@@ -7,16 +9,80 @@ class Settings(BaseSettings):
     items_per_user: int = 50
     wms_token: str = 'lol'
     wms_url: str = 'lol'
+    wms_prefetch_pages: int = 2
+    wms_verify_ssl: bool = False
+    # outbound HTTP, shared by all integration calls of a worker
+    http_pool_limit: int = 100
+    http_pool_limit_per_host: int = 20
+    http_dns_ttl: int = 300
+    http_keepalive: float = 30
+    http_timeout: float = 30
+    http_connect_timeout: float = 5
+    http_retries: int = 3
+    http_backoff_base: float = 0.5
+    http_backoff_max: float = 10
+    job_lease_sec: int = 300
+    products_stream_chunk: int = 1000
+    product_cache_size: int = 100000
+    idempotency_cache_size: int = 100000
+    # reject carts with items that are not in the synced WMS catalog
+    cart_catalog_check: bool = False
+    # JSON list of {"id", "lat", "lon"}, without it /order/state keeps the example depot and ETA
+    depots_file: Optional[str] = None
+    courier_speed_kmh: float = 20
+    delivery_base_min: float = 10
+    # per worker concurrency limits by path, see services/load_shedding.py
+    shed_prefix: str = '/lavka/'
+    shed_default_limit: int = 64
+    shed_limits: Dict[str, int] = {
+        '/lavka/v1/integration-entry/v1/order/submit-batch': 8,
+    }
+    shed_max_queue: int = 128
+    # seconds a request may wait for a slot before it gets a 503
+    shed_max_wait: float = 0.5
+    # gunicorn, see conf/runtime.py for the profiles
+    server_profile: str = 'default'
+    server_bind: str = 'unix:/home/viktor-shved/nana_fastapi/gunicorn.sock'
+    server_errorlog: str = '/home/viktor-shved/nana_fastapi/error_log'
+    server_workers: Optional[int] = None
+    server_keepalive: Optional[int] = None
+    server_backlog: Optional[int] = None
+    server_max_requests: Optional[int] = None
+    server_max_requests_jitter: Optional[int] = None
+    server_preload_app: Optional[bool] = None
+    log_level: str = 'INFO'
+    # share of successful requests written to the access log
+    log_sample_rate: float = 0.01
+    simulator_enabled: bool = False
+    simulator_tick_sec: float = 5
+    # seconds an order spends in a status before the simulator moves it on
+    simulator_timings: Dict[str, int] = {
+        'created': 30,
+        'assembling': 120,
+        'assembled': 30,
+        'performer_found': 60,
+        'delivering': 600,
+        'delivery_arrived': 60,
+    }
     DB_PASSWORD: str = 'test'
     DB_NAME: str = 'stub'
     DB_USER: str = 'taxi'
     DB_HOST: str = 'localhost'
+    # workers * db_pool_max_size must stay below Postgres max_connections
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 5
+    db_statement_cache_size: int = 100
+    db_command_timeout: float = 30
+    # idle connections are closed after this many seconds
+    db_connection_lifetime: float = 300
+    # connections are replaced after this many queries
+    db_max_queries: int = 50000
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
-
 @lru_cache()
 def get_settings():
     return Settings()
+
+settings = get_settings()
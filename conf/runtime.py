@@ -0,0 +1,56 @@
+"""
+Gunicorn runtime profiles, picked with Settings.server_profile.
+Any server_* setting that is set explicitly wins over the profile
+"""
+from multiprocessing import cpu_count
+
+from uvicorn.workers import UvicornWorker
+
+
+class FastUvicornWorker(UvicornWorker):
+    """
+    uvloop and httptools are required instead of picked when available
+    """
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+PROFILES = {
+    # what the service ran with before profiles existed: -w 4 and
+    # gunicorn's defaults for everything else
+    'default': {
+        'workers': 4,
+        'keepalive': 2,
+        'backlog': 2048,
+        'max_requests': 0,
+        'max_requests_jitter': 0,
+        'preload_app': False,
+    },
+    # one async worker per core, long keep-alive behind nginx, recycled
+    # with jitter so workers never restart all at once
+    'throughput': {
+        'workers': cpu_count(),
+        'keepalive': 75,
+        'backlog': 4096,
+        'max_requests': 100000,
+        'max_requests_jitter': 10000,
+        'preload_app': True,
+    },
+    'low-memory': {
+        'workers': 2,
+        'keepalive': 5,
+        'backlog': 1024,
+        'max_requests': 10000,
+        'max_requests_jitter': 1000,
+        'preload_app': True,
+    },
+}
+
+
+def gunicorn_options(settings) -> dict:
+    options = dict(PROFILES[settings.server_profile])
+    for name in options:
+        value = getattr(settings, f'server_{name}')
+        if value is not None:
+            options[name] = value
+    options['worker_class'] = 'conf.runtime.FastUvicornWorker'
+    return options
@@ -1,13 +1,38 @@
-from multiprocessing import cpu_count
+import os
+import shutil
+
+from conf.config import settings
+from conf.runtime import gunicorn_options
 
 # Socket Path
-bind = 'unix:/home/viktor-shved/nana_fastapi/gunicorn.sock'
+bind = settings.server_bind
 
-# Worker Options
-workers = cpu_count() + 1
-worker_class = 'uvicorn.workers.UvicornWorker'
+# Worker Options, from settings.server_profile
+_options = gunicorn_options(settings)
+workers = _options['workers']
+worker_class = _options['worker_class']
+keepalive = _options['keepalive']
+backlog = _options['backlog']
+max_requests = _options['max_requests']
+max_requests_jitter = _options['max_requests_jitter']
+preload_app = _options['preload_app']
 
 # Logging Options
-loglevel = 'debug'
-accesslog = '/home/viktor-shved/nana_fastapi/access_log'
-errorlog = '/home/viktor-shved/nana_fastapi/error_log'
+# requests are logged as JSON by the app itself, see services/log.py
+loglevel = 'info'
+accesslog = None
+errorlog = settings.server_errorlog
+
+# Metrics, workers inherit the variable and share samples through files in this directory
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/nana_fastapi_metrics')
+
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
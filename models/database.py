@@ -1,28 +1,99 @@
+import logging
+import time
+from functools import lru_cache
+
+import asyncpg
 import databases
 import sqlalchemy
 from conf.config import settings
-from pydantic import PostgresDsn
-from sqlalchemy.orm import sessionmaker
 # SQLAlchemy specific code, as with any other app
 DATABASE_URL = f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:5432/{settings.DB_NAME}"
 
-SQLALCHEMY_DATABASE_URI = PostgresDsn.build(
-    scheme="postgresql",
-    user=settings.DB_USER,
-    password=settings.DB_PASSWORD,
-    host=settings.DB_HOST,
-    path='/stub',
+# options are passed to asyncpg.create_pool, every gunicorn worker
+# holds up to db_pool_max_size connections
+database = databases.Database(
+    DATABASE_URL,
+    min_size=settings.db_pool_min_size,
+    max_size=settings.db_pool_max_size,
+    statement_cache_size=settings.db_statement_cache_size,
+    command_timeout=settings.db_command_timeout,
+    max_inactive_connection_lifetime=settings.db_connection_lifetime,
+    max_queries=settings.db_max_queries,
 )
-database = databases.Database(DATABASE_URL)
 
 metadata = sqlalchemy.MetaData()
+logger = logging.getLogger(__name__)
+
+
+@lru_cache()
+def get_engine():
+    """
+    Sync engine, only for code that can't use `database`
+    """
+    return sqlalchemy.create_engine(DATABASE_URL)
+
+
+@lru_cache()
+def get_session_local():
+    from sqlalchemy.orm import sessionmaker
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=get_engine()
+    )
+
+
+class PoolStats:
+    """
+    Pool usage of this worker, the wait is the time `databases` spends
+    acquiring a connection from the asyncpg pool
+    """
+
+    def __init__(self):
+        self.acquires = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._pool = None
+
+    def attach(self, db: databases.Database):
+        # databases keeps the asyncpg pool on its backend and only ever awaits
+        # acquire(), neither is public API so the stats switch off if they move
+        pool = getattr(getattr(db, '_backend', None), '_pool', None)
+        if not isinstance(pool, asyncpg.Pool):
+            logger.warning('No asyncpg pool on the databases backend, pool stats are off', extra={
+                'backend': type(getattr(db, '_backend', None)).__name__,
+            })
+            return
+        acquire = pool.acquire
+
+        async def timed_acquire(*args, **kwargs):
+            started = time.perf_counter()
+            connection = await acquire(*args, **kwargs)
+            wait = time.perf_counter() - started
+            self.acquires += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            return connection
+
+        pool.acquire = timed_acquire
+        self._pool = pool
+
+    def stats(self) -> dict:
+        if self._pool is None:
+            return {'connected': False}
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            'connected': True,
+            'size': size,
+            'in_use': size - idle,
+            'idle': idle,
+            'min_size': self._pool.get_min_size(),
+            'max_size': self._pool.get_max_size(),
+            'acquires': self.acquires,
+            'wait_avg_ms': self.wait_total / self.acquires * 1000 if self.acquires else 0.0,
+            'wait_max_ms': self.wait_max * 1000,
+        }
 
-engine = sqlalchemy.create_engine(
-    DATABASE_URL
-)
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
 
+pool_stats = PoolStats()
@@ -0,0 +1,24 @@
+import sqlalchemy
+
+metadata = sqlalchemy.MetaData()
+
+jobs = sqlalchemy.Table(
+    "jobs",
+    metadata,
+    sqlalchemy.Column("id", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("name", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("status", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("pages", sqlalchemy.Integer, nullable=False, server_default="0"),
+    sqlalchemy.Column("rows", sqlalchemy.Integer, nullable=False, server_default="0"),
+    sqlalchemy.Column("created", sqlalchemy.Integer, nullable=False, server_default="0"),
+    sqlalchemy.Column("updated", sqlalchemy.Integer, nullable=False, server_default="0"),
+    sqlalchemy.Column("error", sqlalchemy.String),
+    sqlalchemy.Column("started_at", sqlalchemy.DateTime, server_default=sqlalchemy.func.now()),
+    sqlalchemy.Column("heartbeat_at", sqlalchemy.DateTime, server_default=sqlalchemy.func.now()),
+    sqlalchemy.Column("finished_at", sqlalchemy.DateTime),
+    # the lease: only one running job per name across all workers
+    sqlalchemy.Index(
+        "ix_jobs_running", "name", unique=True,
+        postgresql_where=sqlalchemy.text("status = 'running'")
+    ),
+)
@@ -2,12 +2,74 @@ import sqlalchemy
 
 metadata = sqlalchemy.MetaData()
 
+# every nextval reserves a block of ORDER_ID_BLOCK ids for one worker
+ORDER_ID_BLOCK = 1000
+order_id_seq = sqlalchemy.Sequence("order_id_seq", increment=ORDER_ID_BLOCK, metadata=metadata)
+
 orders = sqlalchemy.Table(
     "orders",
     metadata,
     sqlalchemy.Column("created_order_id", sqlalchemy.String, primary_key=True, index=True),
-    sqlalchemy.Column("order_id", sqlalchemy.String, index=True),
+    sqlalchemy.Column("order_id", sqlalchemy.String, index=True, unique=True),
     sqlalchemy.Column("status", sqlalchemy.String,),
+    sqlalchemy.Column("resolution", sqlalchemy.String),
+    sqlalchemy.Column("payment_status", sqlalchemy.String),
+    sqlalchemy.Column("updated_at", sqlalchemy.DateTime, server_default=sqlalchemy.func.now()),
+    # the simulator looks up due orders per status
+    sqlalchemy.Index("ix_orders_status_updated_at", "status", "updated_at"),
+)
+
+# append only, one row per applied transition
+order_transitions = sqlalchemy.Table(
+    "order_transitions",
+    metadata,
+    sqlalchemy.Column("id", sqlalchemy.BigInteger, primary_key=True),
+    sqlalchemy.Column("order_id", sqlalchemy.String, nullable=False, index=True),
+    sqlalchemy.Column("event", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("from_status", sqlalchemy.String),
+    sqlalchemy.Column("to_status", sqlalchemy.String),
+    sqlalchemy.Column("resolution", sqlalchemy.String),
+    sqlalchemy.Column("created_at", sqlalchemy.DateTime, server_default=sqlalchemy.func.now()),
 )
 
+# what RequestOrder carried besides the cart, one row per order
+order_headers = sqlalchemy.Table(
+    "order_headers",
+    metadata,
+    sqlalchemy.Column("order_id", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("user_id", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("user_phone", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("payment_type", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("use_external_delivery", sqlalchemy.Boolean),
+    sqlalchemy.Column("cart_total_cost", sqlalchemy.Numeric),
+    sqlalchemy.Column("cart_total_discount", sqlalchemy.Numeric),
+    sqlalchemy.Column("delivery_fee", sqlalchemy.Numeric),
+    sqlalchemy.Column("lat", sqlalchemy.Float, nullable=False),
+    sqlalchemy.Column("lon", sqlalchemy.Float, nullable=False),
+    sqlalchemy.Column("place_id", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("floor", sqlalchemy.String),
+    sqlalchemy.Column("flat", sqlalchemy.String),
+    sqlalchemy.Column("doorcode", sqlalchemy.String),
+    sqlalchemy.Column("doorcode_extra", sqlalchemy.String),
+    sqlalchemy.Column("entrance", sqlalchemy.String),
+    sqlalchemy.Column("building_name", sqlalchemy.String),
+    sqlalchemy.Column("doorbell_name", sqlalchemy.String),
+    sqlalchemy.Column("left_at_door", sqlalchemy.Boolean),
+    sqlalchemy.Column("meet_outside", sqlalchemy.Boolean),
+    sqlalchemy.Column("no_door_call", sqlalchemy.Boolean),
+    sqlalchemy.Column("postal_code", sqlalchemy.String),
+    sqlalchemy.Column("comment", sqlalchemy.String),
+)
 
+order_cart_items = sqlalchemy.Table(
+    "order_cart_items",
+    metadata,
+    sqlalchemy.Column("order_id", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("position", sqlalchemy.Integer, primary_key=True),
+    sqlalchemy.Column("item_id", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("quantity", sqlalchemy.Numeric, nullable=False),
+    sqlalchemy.Column("full_price", sqlalchemy.Numeric, nullable=False),
+    sqlalchemy.Column("stack_price", sqlalchemy.Numeric),
+    sqlalchemy.Column("stack_full_price", sqlalchemy.Numeric),
+    sqlalchemy.Column("title", sqlalchemy.String),
+)
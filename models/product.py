@@ -7,6 +7,5 @@ products = sqlalchemy.Table(
     metadata,
     sqlalchemy.Column("product_id", sqlalchemy.String, primary_key=True, index=True),
     sqlalchemy.Column("external_id", sqlalchemy.String, index=True),
+    sqlalchemy.Column("content_hash", sqlalchemy.String(32)),
 )
-
-
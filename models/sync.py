@@ -0,0 +1,11 @@
+import sqlalchemy
+
+metadata = sqlalchemy.MetaData()
+
+sync_state = sqlalchemy.Table(
+    "sync_state",
+    metadata,
+    sqlalchemy.Column("name", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("cursor", sqlalchemy.String),
+    sqlalchemy.Column("updated_at", sqlalchemy.DateTime, server_default=sqlalchemy.func.now()),
+)
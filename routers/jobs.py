@@ -1,44 +1,223 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import uuid
 from functools import wraps
-from typing import List
+from typing import List, Optional
 
-import aiohttp
+import sqlalchemy
 from asyncpg.exceptions import UniqueViolationError
-from fastapi import BackgroundTasks, APIRouter, Request
+from fastapi import BackgroundTasks, APIRouter, HTTPException, Query, Request, Response, status
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.dialects.postgresql import insert
 
 from conf.config import settings
-from models.database import database
+from models.database import database, pool_stats
+from models.job import jobs
 from models.product import products
-from shemas.jobs import Product
+from models.sync import sync_state
+from services.http_client import http_client
+from services.metrics import track_sync_page
+from services.product_cache import notify_products_changed, product_cache
+from shemas.jobs import JobStatus, Product
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
-async def sync_product_from_wms():
+WMS_SYNC_NAME = 'wms_products'
+# 3 bind parameters per row, asyncpg allows at most 32767 per statement
+UPSERT_CHUNK_ROWS = 5000
+
+
+def product_row(product: dict) -> dict:
+    """
+    Products row for a WMS payload, the hash covers the whole payload
+    so any upstream change is picked up on the next sync
+    """
+    payload = json.dumps(product, sort_keys=True, separators=(',', ':'))
+    return {
+        'product_id': product['product_id'],
+        'external_id': product['external_id'],
+        'content_hash': hashlib.blake2b(payload.encode(), digest_size=16).hexdigest(),
+    }
+
+
+async def upsert_products(rows: List[dict]) -> dict:
+    """
+    Write a page of products with INSERT ... ON CONFLICT DO UPDATE, one
+    statement per UPSERT_CHUNK_ROWS rows to stay under the bind parameter
+    limit. Rows with an unchanged content hash are not touched at all
+    """
+    # ON CONFLICT can't affect the same row twice in one statement
+    rows = list({row['product_id']: row for row in rows}.values())
+    written = []
+    for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        stmt = insert(products).values(rows[start:start + UPSERT_CHUNK_ROWS])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[products.c.product_id],
+            set_={
+                'external_id': stmt.excluded.external_id,
+                'content_hash': stmt.excluded.content_hash,
+            },
+            where=products.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+        ).returning(
+            products.c.product_id,
+            # xmax is zero only for freshly inserted tuples
+            sqlalchemy.literal_column('(xmax = 0)').label('inserted'),
+        )
+        written += await database.fetch_all(stmt)
+    if written:
+        await notify_products_changed([row['product_id'] for row in written])
+    created = sum(1 for row in written if row['inserted'])
+    return {
+        'created': created,
+        'updated': len(written) - created,
+        'unchanged': len(rows) - len(written),
+    }
+
+
+async def get_sync_cursor(name: str) -> Optional[str]:
+    query = sync_state.select().where(sync_state.c.name == name)
+    row = await database.fetch_one(query)
+    return row['cursor'] if row else None
+
+
+async def save_sync_cursor(name: str, cursor: str):
+    stmt = insert(sync_state).values(name=name, cursor=cursor)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[sync_state.c.name],
+        set_={'cursor': stmt.excluded.cursor, 'updated_at': sqlalchemy.func.now()},
+    )
+    await database.execute(stmt)
+
+
+async def start_job(name: str) -> Optional[str]:
+    """
+    Take the lease for `name`, None if another worker holds it.
+    A lease without a heartbeat for settings.job_lease_sec is considered dead
+    """
+    await database.execute(
+        jobs.update().where(
+            jobs.c.name == name,
+            jobs.c.status == 'running',
+            jobs.c.heartbeat_at < sqlalchemy.func.now() - datetime.timedelta(seconds=settings.job_lease_sec),
+        ).values(status='failed', error='lease expired', finished_at=sqlalchemy.func.now())
+    )
+    job_id = uuid.uuid4().hex
+    try:
+        await database.execute(jobs.insert().values(id=job_id, name=name, status='running'))
+    except UniqueViolationError:
+        return None
+    return job_id
+
+
+async def track_job(job_id: str, written: dict):
+    """
+    Count a written page and renew the lease
+    """
+    await database.execute(
+        jobs.update().where(jobs.c.id == job_id).values(
+            pages=jobs.c.pages + 1,
+            rows=jobs.c.rows + sum(written.values()),
+            created=jobs.c.created + written['created'],
+            updated=jobs.c.updated + written['updated'],
+            heartbeat_at=sqlalchemy.func.now(),
+        )
+    )
+
+
+async def finish_job(job_id: str, job_status: str, error: str = None):
+    await database.execute(
+        jobs.update().where(jobs.c.id == job_id).values(
+            status=job_status, error=error, finished_at=sqlalchemy.func.now()
+        )
+    )
+
+
+async def run_job(job_id: str, func, **kwargs):
+    """
+    Runs in BackgroundTasks, failures end here once they are recorded on
+    the job. A cancelled job is marked failed too so its lease is freed
+    right away instead of after settings.job_lease_sec
+    """
+    try:
+        await func(job_id=job_id, **kwargs)
+    except asyncio.CancelledError:
+        logger.warning('Job cancelled', extra={'job_id': job_id})
+        await asyncio.shield(finish_job(job_id, 'failed', 'cancelled'))
+        raise
+    except Exception as exc:
+        logger.exception('Job failed', extra={'job_id': job_id})
+        await finish_job(job_id, 'failed', repr(exc))
+        return
+    await finish_job(job_id, 'succeeded')
+
+
+async def fetch_wms_pages(queue: asyncio.Queue, cursor: str):
+    """
+    Producer side of the sync: walks the WMS cursor and puts
+    (resume cursor, products) pages into the queue, blocking while it is full.
+    None marks the end
+    """
     body = {
-        "cursor": '1',
+        "cursor": cursor,
         "locale": "saudi_arabica"
     }
-    async with aiohttp.ClientSession(
-            headers={'Authorization': f'Bearer {settings.wms_token}'}) as session:
+    try:
         while body.get('cursor'):
-            async with session.post(
-                    f'{settings.wms_url}/api/external/products/v1/products',
-                    json=body,
-                    verify_ssl=False) as resp:
-                resp = await resp.json()
-            for product in resp.get('products'):
-                query = products.insert().values(
-                    product_id=product['product_id'],
-                    external_id=product['external_id']
-                )
-                try:
-                    await database.execute(query)
-                    print(f"Created product: {product['external_id']}")
-                except UniqueViolationError:
-                    print(f"Updated product: {product['external_id']}")
-                    continue
+            resp = await http_client.request_json(
+                'wms', 'POST',
+                f'{settings.wms_url}/api/external/products/v1/products',
+                json=body,
+                headers={'Authorization': f'Bearer {settings.wms_token}'},
+                verify_ssl=settings.wms_verify_ssl,
+            )
+            # after the last page resume from it, newer products are appended there
+            resume = resp.get('cursor') or body['cursor']
+            await queue.put((resume, resp.get('products') or []))
             body['cursor'] = resp.get('cursor', None)
+    except Exception as exc:
+        await queue.put(exc)
+        raise
+    await queue.put(None)
+
+
+async def sync_product_from_wms(prefetch: int = None, full: bool = False, job_id: str = None):
+    """
+    Fetching the next cursor page overlaps with writing the current one,
+    at most `prefetch` pages are buffered in between.
+    Starts from the cursor stored by the previous run unless `full` is set,
+    every written page moves the stored cursor in the same transaction
+    """
+    cursor = None if full else await get_sync_cursor(WMS_SYNC_NAME)
+    queue = asyncio.Queue(maxsize=prefetch or settings.wms_prefetch_pages)
+    stats = {'created': 0, 'updated': 0, 'unchanged': 0}
+    producer = asyncio.create_task(fetch_wms_pages(queue, cursor or '1'))
+    try:
+        while (page := await queue.get()) is not None:
+            if isinstance(page, Exception):
+                raise page
+            resume, items = page
+            async with database.transaction():
+                written = await upsert_products([product_row(product) for product in items])
+                await save_sync_cursor(WMS_SYNC_NAME, resume)
+                if job_id:
+                    await track_job(job_id, written)
+            track_sync_page(written)
+            logger.info('Products page written', extra={
+                'job_id': job_id, 'cursor': resume, 'rows': written,
+            })
+            for key, value in written.items():
+                stats[key] += value
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+    logger.info('Products synced', extra={'job_id': job_id, 'rows': stats})
+    return stats
 
 
 def token_required(func):
@@ -54,20 +233,127 @@ def token_required(func):
 
 @router.post("/sync-products", name='Sync WMS Products', include_in_schema=False)
 @token_required
-async def sync_products(request: Request, background_tasks: BackgroundTasks):
+async def sync_products(request: Request, background_tasks: BackgroundTasks, full: bool = False):
     """
     Company token required
+    - full: ignore the stored cursor and resync the whole catalog
     """
-    background_tasks.add_task(sync_product_from_wms)
-    return {"message": "Notification sent in the background"}
+    job_id = await start_job(WMS_SYNC_NAME)
+    if job_id is None:
+        running = await database.fetch_one(
+            jobs.select().where(jobs.c.name == WMS_SYNC_NAME, jobs.c.status == 'running')
+        )
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"message": "Sync is already running", "job_id": running['id'] if running else None}
+        )
+    background_tasks.add_task(run_job, job_id, sync_product_from_wms, full=full)
+    return {"message": "Notification sent in the background", "job_id": job_id}
+
+
+PRODUCTS_STREAM_SQL = (
+    'SELECT product_id, external_id FROM products '
+    'WHERE product_id > $1 ORDER BY product_id'
+)
+
+
+async def stream_products(after: str, array: bool):
+    """
+    Rows go from a server side cursor straight to the socket,
+    at most one chunk of products is held in memory
+    """
+    async with database.connection() as connection:
+        raw = connection.raw_connection
+        async with raw.transaction():
+            chunk = []
+            separator = ''
+            if array:
+                yield '['
+            async for product_id, external_id in raw.cursor(
+                    PRODUCTS_STREAM_SQL, after, prefetch=settings.products_stream_chunk):
+                line = json.dumps({'product_id': product_id, 'external_id': external_id})
+                if array:
+                    chunk.append(separator)
+                    separator = ','
+                    chunk.append(line)
+                else:
+                    chunk.append(line + '\n')
+                if len(chunk) >= settings.products_stream_chunk:
+                    yield ''.join(chunk)
+                    chunk = []
+            if array:
+                chunk.append(']')
+            yield ''.join(chunk)
 
 
 @router.get("/get-products", name='Get all products', response_model=List[Product], include_in_schema=False)
 @token_required
-async def get_products(request: Request):
+async def get_products(
+        request: Request,
+        response: Response,
+        after: str = '',
+        limit: int = Query(1000, ge=1, le=10000),
+        stream: Optional[str] = Query(None, regex='^(ndjson|json)$'),
+):
     """
     Company token required
+    - after: return products with product_id greater than this one,
+      the next value is sent in the X-Next-Cursor header
+    - limit: page size
+    - stream: ndjson or json, stream the whole catalog starting from `after`
     """
-    query = products.select()
+    if stream == 'ndjson':
+        return StreamingResponse(stream_products(after, array=False), media_type='application/x-ndjson')
+    if stream == 'json':
+        return StreamingResponse(stream_products(after, array=True), media_type='application/json')
+    query = products.select().where(
+        products.c.product_id > after
+    ).order_by(products.c.product_id).limit(limit)
     data = await database.fetch_all(query)
+    if len(data) == limit:
+        response.headers['X-Next-Cursor'] = data[-1]['product_id']
     return data
+
+
+@router.get("/product-cache", name='Product cache stats', include_in_schema=False)
+@token_required
+async def get_product_cache_stats(request: Request):
+    """
+    Company token required
+    Counters of this worker only
+    """
+    return product_cache.stats()
+
+
+@router.get("/db-pool", name='Database pool stats', include_in_schema=False)
+@token_required
+async def get_db_pool_stats(request: Request):
+    """
+    Company token required
+    Pool of this worker only
+    """
+    return pool_stats.stats()
+
+
+@router.get("/{job_id}", name='Job status', response_model=JobStatus, include_in_schema=False)
+@token_required
+async def get_job(request: Request, job_id: str):
+    """
+    Company token required
+    """
+    job = await database.fetch_one(jobs.select().where(jobs.c.id == job_id))
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Job not found')
+    job = dict(job)
+    elapsed = ((job['finished_at'] or job['heartbeat_at']) - job['started_at']).total_seconds()
+    job['rows_per_sec'] = job['rows'] / elapsed if elapsed > 0 else None
+    job['eta_sec'] = None
+    if job['status'] == 'running' and job['rows_per_sec']:
+        last = await database.fetch_one(
+            jobs.select().where(
+                jobs.c.name == job['name'], jobs.c.status == 'succeeded'
+            ).order_by(jobs.c.finished_at.desc()).limit(1)
+        )
+        if last is not None:
+            job['eta_sec'] = max(last['rows'] - job['rows'], 0) / job['rows_per_sec']
+    return job
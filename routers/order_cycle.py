@@ -1,17 +1,96 @@
-from random import randint
-
-from asyncpg.exceptions import UniqueViolationError
 from fastapi import APIRouter, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 
+from conf.config import settings
 from models.database import database
-from models.order import orders
-from shemas.shemas_order_cycle import *
+from models.order import order_headers, orders
+from services.cart_pricing import UnknownCartItems, known_items, price_cart
+from services.depots import get_depot_index
+from services.idempotency import recent_orders
+from services.load_shedding import retry_after
+from services.order_ids import order_ids
+from services.order_lifecycle import OrderNotFound, TransitionError, transition
+from services.order_store import save_order_details
+from services.responses import PreparedJSONResponse
+from shemas.shemas_order_cycle import (
+    BatchOrderResponse,
+    BatchRequestOrder,
+    CancelOrderRequest,
+    ContactObtainRequest,
+    ContactObtainResponse,
+    EmptyResponse,
+    OrderInfo,
+    OrderResponce,
+    OrderStatus,
+    OrderValidationError,
+    OrderValidationErrorDetails,
+    OrdersStateRequest,
+    OrdersStateResponse,
+    RequestOrder,
+    SetPaymentStatus,
+)
 
 router = APIRouter()
 
 
+# canned responses are validated and serialized once per worker
+ORDER_INFO_EXAMPLE = jsonable_encoder(OrderInfo.get_example())
+ORDER_STATUSES = {order_status.value for order_status in OrderStatus}
+CONTACT_OBTAIN_EXAMPLE = ContactObtainResponse.get_example().json().encode()
+EMPTY = b'{}'
+
+
+def order_info(row, depot_location: dict = None, delivery_eta_min: int = None) -> dict:
+    """
+    Stored orders only know their id, status and delivery point,
+    the rest is the example
+    """
+    order_status = row['status']
+    if order_status not in ORDER_STATUSES:
+        order_status = OrderStatus.created.value
+    info = {
+        **ORDER_INFO_EXAMPLE,
+        'id': row['order_id'],
+        'short_order_id': row['order_id'],
+        'status': order_status,
+        'resolution': row['resolution'] or ORDER_INFO_EXAMPLE['resolution'],
+    }
+    if depot_location is not None:
+        info['depot_location'] = depot_location
+        info['delivery_eta_min'] = delivery_eta_min
+    return info
+
+
+def orders_info(rows) -> list:
+    """
+    Nearest depot and ETA for all orders with a known delivery point at once
+    """
+    index = get_depot_index()
+    located = [i for i, row in enumerate(rows) if row['lat'] is not None]
+    if not index or not located:
+        return [order_info(row) for row in rows]
+    lat = [rows[i]['lat'] for i in located]
+    lon = [rows[i]['lon'] for i in located]
+    depots = index.nearest(lat, lon)
+    etas = index.eta_min(lat, lon, depots).tolist()
+    extra = {
+        i: ({'lat': float(index.lat[depot]), 'lon': float(index.lon[depot])}, eta)
+        for i, depot, eta in zip(located, depots.tolist(), etas)
+    }
+    return [order_info(row, *extra.get(i, (None, None))) for i, row in enumerate(rows)]
+
+
+def order_error(code: str, message: str) -> OrderValidationError:
+    return OrderValidationError(
+        code=code,
+        message=message,
+        details=OrderValidationErrorDetails(cart=None, retry_after=retry_after())
+    )
+
+
 @router.post('/lavka/v1/integration-entry/v1/order/submit',
              response_model=OrderResponce,
              responses={400: {'model': OrderValidationError}},
@@ -25,30 +104,108 @@ async def OrderCreate(order: RequestOrder):
     - location,
     - information about the cart,
     - and other parameters
+
+    Submits are idempotent by created_order_id,
+    a retry gets the order_id of the original order
     """
-    dat = datetime.date.today()
-    resp = OrderResponce(
-        order_id=f"{dat.strftime('%y%m%d')}-{randint(100000, 999999)}"
-    )
-    query = orders.insert().values(
-        order_id=resp.order_id,
-        created_order_id=order.created_order_id,
-        status='NEW'
-    )
-    try:
-        await database.execute(query)
-    except UniqueViolationError as exc:
+    if order.created_order_id is None:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content=jsonable_encoder({
-                "code": "grocery_order_id_exists",
-                "message": str(exc),
-                "details": {
-                    "cart": None,
-                    "retry_after": 5
-                }})
+            content=jsonable_encoder(order_error('bad_request', 'created_order_id is required'))
         )
-    return resp
+    order_id = recent_orders.get(order.created_order_id)
+    if order_id is None:
+        if settings.cart_catalog_check:
+            try:
+                price_cart(order.cart, await known_items([order.cart]))
+            except UnknownCartItems as exc:
+                return JSONResponse(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    content=jsonable_encoder(order_error('unknown_cart_items', str(exc)))
+                )
+        query = insert(orders).values(
+            order_id=await order_ids.allocate(),
+            created_order_id=order.created_order_id,
+            status=OrderStatus.created.value
+        ).on_conflict_do_nothing(
+            index_elements=[orders.c.created_order_id]
+        ).returning(orders.c.order_id)
+        async with database.transaction():
+            order_id = await database.fetch_val(query)
+            if order_id is not None:
+                await save_order_details([(order_id, order)])
+        if order_id is None:
+            order_id = await database.fetch_val(
+                orders.select().with_only_columns([orders.c.order_id]).where(
+                    orders.c.created_order_id == order.created_order_id
+                )
+            )
+        recent_orders.put(order.created_order_id, order_id)
+    return OrderResponce(order_id=order_id)
+
+
+@router.post('/lavka/v1/integration-entry/v1/order/submit-batch',
+             response_model=BatchOrderResponse,
+             name='Order Create Batch'
+             )
+async def OrderCreateBatch(batch: BatchRequestOrder):
+    """
+    Creating up to 500 orders with one request,
+    every order gets the same result as from Order Create
+    """
+    results = []
+    rows = {}
+    requests = {}
+    known = None
+    if settings.cart_catalog_check:
+        known = await known_items(order.cart for order in batch.orders)
+    for order in batch.orders:
+        if order.created_order_id is None:
+            results.append(order_error('bad_request', 'created_order_id is required'))
+            continue
+        order_id = recent_orders.get(order.created_order_id)
+        if order_id is not None:
+            results.append(OrderResponce(order_id=order_id))
+            continue
+        if known is not None:
+            try:
+                price_cart(order.cart, known)
+            except UnknownCartItems as exc:
+                results.append(order_error('unknown_cart_items', str(exc)))
+                continue
+        if order.created_order_id not in rows:
+            rows[order.created_order_id] = {
+                'created_order_id': order.created_order_id,
+                'order_id': None,
+                'status': OrderStatus.created.value,
+            }
+            requests[order.created_order_id] = order
+        results.append(order.created_order_id)
+    if rows:
+        for row, order_id in zip(rows.values(), await order_ids.allocate_many(len(rows))):
+            row['order_id'] = order_id
+        query = insert(orders).values(list(rows.values())).on_conflict_do_nothing(
+            index_elements=[orders.c.created_order_id]
+        ).returning(orders.c.created_order_id)
+        async with database.transaction():
+            created = {row['created_order_id'] for row in await database.fetch_all(query)}
+            await save_order_details(
+                (rows[created_order_id]['order_id'], requests[created_order_id]) for created_order_id in created
+            )
+        existing = [created_order_id for created_order_id in rows if created_order_id not in created]
+        if existing:
+            query = orders.select().with_only_columns(
+                [orders.c.created_order_id, orders.c.order_id]
+            ).where(orders.c.created_order_id.in_(existing))
+            for row in await database.fetch_all(query):
+                rows[row['created_order_id']]['order_id'] = row['order_id']
+        for created_order_id, row in rows.items():
+            recent_orders.put(created_order_id, row['order_id'])
+    results = [
+        OrderResponce(order_id=rows[result]['order_id']) if isinstance(result, str) else result
+        for result in results
+    ]
+    return BatchOrderResponse(results=results)
 
 
 @router.post('/lavka/v1/integration-entry/v1/order/state',
@@ -58,9 +215,17 @@ async def OrderCreate(order: RequestOrder):
              )
 async def OrderState(order: OrdersStateRequest):
     """
-    Find out the status of the order list
+    Find out the status of the order list, up to 500 orders per request
     """
-    return OrdersStateResponse.get_example()
+    query = select([orders, order_headers.c.lat, order_headers.c.lon]).select_from(
+        orders.outerjoin(order_headers, order_headers.c.order_id == orders.c.order_id)
+    ).where(
+        orders.c.order_id == any_(bindparam('order_ids', value=order.known_orders, type_=ARRAY(String)))
+    )
+    rows = await database.fetch_all(query)
+    if not rows:
+        return PreparedJSONResponse(EMPTY, status_code=status.HTTP_404_NOT_FOUND)
+    return PreparedJSONResponse({'grocery_orders': orders_info(rows)})
 
 
 @router.post('/lavka/v1/integration-entry/v1/order/actions/cancel',
@@ -71,9 +236,15 @@ async def OrderState(order: OrdersStateRequest):
              )
 async def OrderState(order: CancelOrderRequest):
     """
-    Cancel the order
+    Cancel the order, possible until a courier is found
     """
-    return JSONResponse({})
+    try:
+        await transition(order.order_id, 'cancel')
+    except OrderNotFound:
+        return PreparedJSONResponse(EMPTY, status_code=status.HTTP_404_NOT_FOUND)
+    except TransitionError:
+        return PreparedJSONResponse(EMPTY, status_code=status.HTTP_400_BAD_REQUEST)
+    return PreparedJSONResponse(EMPTY, status_code=status.HTTP_202_ACCEPTED)
 
 
 @router.post('/lavka/v1/integration-entry/v1/order/contact/obtain',
@@ -87,18 +258,26 @@ async def OrderState(order: ContactObtainRequest):
     """
     Contact Obtain
     """
-    return ContactObtainResponse.get_example()
+    return PreparedJSONResponse(CONTACT_OBTAIN_EXAMPLE)
 
 
 @router.post(
     '/lavka/v1/integration-entry/v1/order/set-payment-status',
     response_model=EmptyResponse,
-    responses={404: {'model': EmptyResponse, 'name': 'Order not found'}},
+    responses={404: {'model': EmptyResponse, 'name': 'Order not found'}, 409: {'model': EmptyResponse}},
     name='Set Payment Status'
 )
 async def OrderState(order: SetPaymentStatus):
     """
     Set Payment Status
+    A failed payment closes the order unless a courier is already found
     """
-
-    return JSONResponse({})
+    if order.payment_status is None:
+        return PreparedJSONResponse(EMPTY)
+    try:
+        await transition(order.order_id, f'payment_{order.payment_status.value}')
+    except OrderNotFound:
+        return PreparedJSONResponse(EMPTY, status_code=status.HTTP_404_NOT_FOUND)
+    except TransitionError:
+        return PreparedJSONResponse(EMPTY, status_code=status.HTTP_409_CONFLICT)
+    return PreparedJSONResponse(EMPTY)
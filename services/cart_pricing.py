@@ -0,0 +1,38 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List
+
+from services.product_cache import product_cache
+from shemas.shemas_order_cycle import Cart
+
+
+class UnknownCartItems(ValueError):
+
+    def __init__(self, item_ids: List[str]):
+        super().__init__(f"Unknown cart items: {', '.join(item_ids)}")
+        self.item_ids = item_ids
+
+
+async def known_items(carts: Iterable[Cart]) -> Dict[str, str]:
+    """
+    external_id -> product_id for every catalog item of the carts,
+    resolved by the product cache with at most one query for the misses
+    """
+    item_ids = {item.id for cart in carts for item in cart.items}
+    return await product_cache.product_ids(item_ids)
+
+
+def price_cart(cart: Cart, known: Dict[str, str]) -> Decimal:
+    """
+    Rejects items missing from the catalog and fills in cart_total_cost when
+    the partner did not send one. The catalog has no prices, the total is the
+    exact Decimal sum of the cart's own prices, a sent total was already
+    checked against it by Cart validation
+    """
+    unknown = [item.id for item in cart.items if item.id not in known]
+    if unknown:
+        raise UnknownCartItems(list(dict.fromkeys(unknown)))
+    if cart.cart_total_cost is not None:
+        return Decimal(cart.cart_total_cost)
+    total = Cart.items_total(cart.items)
+    cart.cart_total_cost = str(total)
+    return total
@@ -0,0 +1,137 @@
+"""
+Depot registry with a k-d tree for nearest-depot lookups. Points are kept as
+unit vectors on the sphere, the smallest chord distance there is also the
+smallest great-circle distance, so the tree works with plain Euclidean
+distances and has no trouble around the antimeridian
+"""
+import json
+import math
+from typing import List
+
+import numpy as np
+
+from conf.config import settings
+
+EARTH_RADIUS_KM = 6371.0088
+# up to this many depots a vectorized scan beats the Python tree walk per
+# query whatever the batch size, see benchmarks/depots.py
+SCAN_MAX_DEPOTS = 15000
+# queries x depots dot products computed at once by the scan
+SCAN_CHUNK_CELLS = 1 << 20
+
+
+def unit_vectors(lat, lon) -> np.ndarray:
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class DepotIndex:
+
+    def __init__(self, ids: List[str], lat, lon):
+        self.ids = list(ids)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.points = unit_vectors(self.lat, self.lon)
+        # the search walks single points, plain lists are much faster to index there
+        self._coords = self.points.tolist()
+        # node -> depot index, split axis, left node, right node; -1 is no node
+        self._depot: List[int] = []
+        self._axis: List[int] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._root = self._build(np.arange(len(self.ids)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build(self, idx: np.ndarray) -> int:
+        if idx.size == 0:
+            return -1
+        points = self.points[idx]
+        axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        idx = idx[np.argsort(points[:, axis], kind='stable')]
+        mid = idx.size // 2
+        node = len(self._depot)
+        self._depot.append(int(idx[mid]))
+        self._axis.append(axis)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._left[node] = self._build(idx[:mid])
+        self._right[node] = self._build(idx[mid + 1:])
+        return node
+
+    def _nearest(self, point) -> int:
+        x = point
+        coords = self._coords
+        best, best_dist = -1, math.inf
+        # (node, lower bound of the squared distance to anything below it)
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            # bounds are rechecked on pop, best_dist may have shrunk since the push
+            if node < 0 or bound >= best_dist:
+                continue
+            depot = self._depot[node]
+            p = coords[depot]
+            dist = (p[0] - x[0]) ** 2 + (p[1] - x[1]) ** 2 + (p[2] - x[2]) ** 2
+            if dist < best_dist:
+                best, best_dist = depot, dist
+            axis = self._axis[node]
+            diff = x[axis] - p[axis]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            # the far side is pushed first so the near side is searched first
+            far_bound = max(bound, diff * diff)
+            if far_bound < best_dist:
+                stack.append((far, far_bound))
+            stack.append((near, bound))
+        return best
+
+    def _scan(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Brute force over all depots, the nearest point on the sphere has the
+        largest dot product. Queries go in chunks to bound the product matrix
+        """
+        found = np.empty(len(queries), dtype=np.intp)
+        step = max(1, SCAN_CHUNK_CELLS // len(self.ids))
+        for start in range(0, len(queries), step):
+            found[start:start + step] = np.argmax(queries[start:start + step] @ self.points.T, axis=1)
+        return found
+
+    def nearest(self, lat, lon) -> np.ndarray:
+        """
+        Index of the nearest depot for every point, a vectorized scan for
+        registries up to SCAN_MAX_DEPOTS, the tree in O(log n) each above
+        """
+        queries = unit_vectors(lat, lon).reshape(-1, 3)
+        if len(self.ids) <= SCAN_MAX_DEPOTS:
+            return self._scan(queries)
+        return np.array([self._nearest(point) for point in queries.tolist()], dtype=np.intp)
+
+    def eta_min(self, lat, lon, depots: np.ndarray) -> np.ndarray:
+        """
+        Delivery ETA in whole minutes from each depot to its point, vectorized
+        """
+        distance = haversine_km(self.lat[depots], self.lon[depots], lat, lon)
+        eta = settings.delivery_base_min + distance / settings.courier_speed_kmh * 60
+        return np.maximum(np.ceil(eta), 1).astype(np.int64)
+
+
+def load_depots(path: str) -> DepotIndex:
+    """
+    The file is a JSON list of {"id": ..., "lat": ..., "lon": ...}
+    """
+    with open(path) as f:
+        depots = json.load(f)
+    return DepotIndex(
+        [str(depot['id']) for depot in depots],
+        [depot['lat'] for depot in depots],
+        [depot['lon'] for depot in depots],
+    )
@@ -0,0 +1,25 @@
+"""
+Depot registry entry point. The k-d tree in services.depot_index needs
+NumPy, it is only imported once depots are configured so workers without
+depots don't pay for it at import
+"""
+from typing import TYPE_CHECKING, Optional
+
+from conf.config import settings
+
+if TYPE_CHECKING:
+    from services.depot_index import DepotIndex
+
+_depot_index: Optional['DepotIndex'] = None
+
+
+def get_depot_index() -> Optional['DepotIndex']:
+    """
+    None while no depots are configured, loaded on first use
+    """
+    global _depot_index
+    if _depot_index is None and settings.depots_file:
+        from services.depot_index import load_depots
+
+        _depot_index = load_depots(settings.depots_file)
+    return _depot_index
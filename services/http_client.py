@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+import aiohttp
+import orjson
+
+from conf.config import settings
+from services.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def retry_after(resp: aiohttp.ClientResponse, body) -> Optional[float]:
+    """
+    Seconds the upstream asked to wait, from the Retry-After header or the
+    details.retry_after field of the error envelope
+    """
+    header = resp.headers.get('Retry-After')
+    if header and header.isdigit():
+        return float(header)
+    if isinstance(body, dict):
+        value = (body.get('details') or {}).get('retry_after')
+        if isinstance(value, (int, float)):
+            return float(value)
+    return None
+
+
+def backoff(attempt: int, wait: Optional[float] = None) -> float:
+    """
+    Full jitter exponential backoff, never shorter than what the upstream asked for
+    """
+    delay = random.uniform(0, min(settings.http_backoff_max, settings.http_backoff_base * 2 ** attempt))
+    if wait is not None:
+        delay += wait
+    return delay
+
+
+class OutboundClient:
+    """
+    One aiohttp session per worker for every outbound integration call,
+    opened and closed by the app's startup and shutdown hooks
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(
+            limit=settings.http_pool_limit,
+            limit_per_host=settings.http_pool_limit_per_host,
+            ttl_dns_cache=settings.http_dns_ttl,
+            keepalive_timeout=settings.http_keepalive,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.http_timeout, connect=settings.http_connect_timeout
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self):
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def request_json(self, upstream: str, method: str, url: str, *,
+                           retries: int = None, verify_ssl: bool = True, **kwargs):
+        """
+        Send a request and return the decoded JSON body. Connection errors,
+        timeouts and 429/5xx answers are retried up to `retries` times,
+        `upstream` labels the metrics
+        """
+        if self._session is None:
+            raise RuntimeError('Outbound client is not started')
+        retries = settings.http_retries if retries is None else retries
+        ssl = None if verify_ssl else False
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                async with self._session.request(method, url, ssl=ssl, **kwargs) as resp:
+                    status = resp.status
+                    raw = await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                UPSTREAM_LATENCY.labels(upstream, 'error').observe(time.perf_counter() - started)
+                UPSTREAM_ERRORS.labels(upstream, type(exc).__name__).inc()
+                if attempt == retries:
+                    raise
+                wait = backoff(attempt)
+            else:
+                UPSTREAM_LATENCY.labels(upstream, str(status)).observe(time.perf_counter() - started)
+                try:
+                    body = orjson.loads(raw)
+                except ValueError:
+                    # proxies answer 502/503 with html, keep going to the retry logic
+                    body = None
+                if status < 400:
+                    if body is None and raw.strip() != b'null':
+                        UPSTREAM_ERRORS.labels(upstream, 'invalid_json').inc()
+                        raise ValueError(f'{upstream} answered {status} with a non JSON body: {raw[:200]!r}')
+                    return body
+                UPSTREAM_ERRORS.labels(upstream, str(status)).inc()
+                if status not in RETRY_STATUSES or attempt == retries:
+                    raise aiohttp.ClientResponseError(
+                        resp.request_info, resp.history, status=status,
+                        message=str(raw[:200] if body is None else body)[:200]
+                    )
+                wait = backoff(attempt, retry_after(resp, body))
+            logger.warning('Retrying upstream call', extra={
+                'upstream': upstream, 'attempt': attempt + 1, 'wait_sec': round(wait, 3),
+            })
+            await asyncio.sleep(wait)
+
+
+http_client = OutboundClient()
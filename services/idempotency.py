@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from typing import Optional
+
+from conf.config import settings
+
+
+class RecentOrders:
+    """
+    Per-worker LRU of created_order_id -> order_id for recently submitted
+    orders, answers most partner retries without touching Postgres
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._orders: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, created_order_id: str) -> Optional[str]:
+        order_id = self._orders.get(created_order_id)
+        if order_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._orders.move_to_end(created_order_id)
+        return order_id
+
+    def put(self, created_order_id: str, order_id: str):
+        if self.maxsize <= 0:
+            return
+        self._orders[created_order_id] = order_id
+        self._orders.move_to_end(created_order_id)
+        if len(self._orders) > self.maxsize:
+            self._orders.popitem(last=False)
+
+
+recent_orders = RecentOrders(settings.idempotency_cache_size)
@@ -0,0 +1,183 @@
+"""
+Per-route concurrency limits. Requests over the limit wait in a bounded
+FIFO queue, when it is full or the wait runs out they are shed with the
+usual error envelope and a retry_after computed from the current queue
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import orjson
+from starlette.routing import Match
+
+from conf.config import settings
+from services.metrics import QUEUE_WAIT, SHED_REQUESTS
+
+
+class Shed(Exception):
+
+    def __init__(self, status: int, retry_after: int):
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RouteLimiter:
+
+    def __init__(self, route: str, limit: int, max_queue: int, max_wait: float, endpoint=None):
+        self.route = route
+        self.endpoint = endpoint
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiters: deque = deque()
+        # moving average of how long a request holds its slot
+        self.service_time = 0.01
+        self._queue_wait = QUEUE_WAIT.labels(route)
+
+    def retry_after(self) -> int:
+        """
+        Time for everybody already queued to get through, in whole seconds
+        """
+        return max(1, math.ceil((len(self.waiters) + 1) * self.service_time / self.limit))
+
+    async def acquire(self) -> float:
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self._queue_wait.observe(0)
+            return 0.0
+        if len(self.waiters) >= self.max_queue:
+            raise Shed(429, self.retry_after())
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            # a slot handed over right at the deadline is kept
+            if not waiter.done():
+                self.waiters.remove(waiter)
+                raise Shed(503, self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done():
+                self._hand_over()
+            else:
+                self.waiters.remove(waiter)
+            raise
+        waited = time.perf_counter() - started
+        self._queue_wait.observe(waited)
+        return waited
+
+    def release(self, held: float):
+        self.service_time += (held - self.service_time) * 0.1
+        self._hand_over()
+
+    def _hand_over(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                # the slot goes straight to the next waiter, active stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+# route template -> limiter, built once from the app routes so unknown
+# paths can't add limiters or metric labels
+limiters: Dict[str, RouteLimiter] = {}
+
+
+def build_limiters(app):
+    """
+    One limiter per route under settings.shed_prefix plus the paths in
+    settings.shed_limits, and one shared bucket for unknown paths under
+    the prefix
+    """
+    endpoints = {route.path: route.endpoint for route in app.routes if hasattr(route, 'endpoint')}
+    paths = [path for path in endpoints if path.startswith(settings.shed_prefix)]
+    paths += [path for path in settings.shed_limits if path not in paths]
+    paths.append(settings.shed_prefix)
+    for path in paths:
+        limit = settings.shed_limits.get(path, settings.shed_default_limit)
+        if limit:
+            limiters[path] = RouteLimiter(
+                path, limit, settings.shed_max_queue, settings.shed_max_wait, endpoints.get(path)
+            )
+
+
+def limiter_for(scope) -> Optional[RouteLimiter]:
+    path = scope['path']
+    if not path.startswith(settings.shed_prefix):
+        return None
+    if not limiters:
+        build_limiters(scope['app'])
+    limiter = limiters.get(path)
+    if limiter is not None:
+        return limiter
+    for route in scope['app'].routes:
+        if route.matches(scope)[0] != Match.NONE:
+            return limiters.get(route.path)
+    return limiters.get(settings.shed_prefix)
+
+
+def retry_after(scope=None) -> int:
+    """
+    retry_after for error responses, from the queue of the request's
+    route or the most loaded one
+    """
+    if scope is not None:
+        limiter = limiter_for(scope)
+        return limiter.retry_after() if limiter else 1
+    return max((limiter.retry_after() for limiter in limiters.values()), default=1)
+
+
+class LoadSheddingMiddleware:
+    """
+    Pure ASGI middleware, sits inside MetricsMiddleware so shed responses
+    are counted
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limiter = limiter_for(scope) if scope['type'] == 'http' else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await limiter.acquire()
+        except Shed as shed:
+            SHED_REQUESTS.labels(limiter.route, str(shed.status)).inc()
+            if limiter.endpoint is not None:
+                # the router never sees a shed request, label it for MetricsMiddleware
+                scope['endpoint'] = limiter.endpoint
+            await self._reject(send, shed)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+    @staticmethod
+    async def _reject(send, shed: Shed):
+        body = orjson.dumps({
+            "code": "too_many_requests",
+            "message": "Service is overloaded, retry later",
+            "details": {
+                "cart": None,
+                "retry_after": shed.retry_after
+            }})
+        await send({
+            'type': 'http.response.start',
+            'status': shed.status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(shed.retry_after).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
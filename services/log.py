@@ -0,0 +1,156 @@
+"""
+Structured JSON logging. Request coroutines only put records on a queue,
+formatting and writing happen in the QueueListener thread
+"""
+import atexit
+import copy
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+
+from conf.config import settings
+
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+# attributes every LogRecord has, anything else came from `extra`
+RECORD_ATTRS = set(logging.LogRecord('', 0, '', 0, '', None, None).__dict__) | {'message', 'request_id', 'sample'}
+
+access_logger = logging.getLogger('access')
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class ContextFilter(logging.Filter):
+    """
+    Runs in the caller before the record is queued: drops sampled-out
+    records and captures the request id while the request context is current.
+    High-volume events pass extra={'sample': rate} and are kept with that probability
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample = getattr(record, 'sample', None)
+        if sample is not None and random.random() >= sample:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class ExcQueueHandler(QueueHandler):
+    """
+    Keeps the record's fields for the JSON formatter, only the traceback
+    is rendered here because exc_info can't cross threads
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: str = 'INFO') -> QueueListener:
+    log_queue = queue.SimpleQueue()
+    handler = ExcQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    # with gunicorn preload_app the app is imported in the master,
+    # the writer thread does not survive the fork into workers
+    os.register_at_fork(after_in_child=lambda: restart_listener(listener))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    # requests are logged by RequestContextMiddleware
+    logging.getLogger('uvicorn.access').setLevel(logging.WARNING)
+    for name in ('uvicorn', 'uvicorn.error', 'gunicorn.error'):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    return listener
+
+
+def restart_listener(listener: QueueListener):
+    listener._thread = None
+    listener.start()
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware: takes X-Request-ID from the request or makes one,
+    returns it in the response and writes an access record per request,
+    successful ones sampled at settings.log_sample_rate
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope['headers']:
+            if name == b'x-request-id':
+                request_id = value.decode('latin-1')
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'x-request-id', request_id.encode('latin-1'))
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            access_logger.info('%s %s %s', scope['method'], scope['path'], status, extra={
+                'method': scope['method'],
+                'path': scope['path'],
+                'status': status,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                # errors are always written, successes are the high-volume part
+                'sample': settings.log_sample_rate if status < 400 else None,
+            })
+            request_id_var.reset(token)
@@ -0,0 +1,137 @@
+"""
+Prometheus metrics. Under gunicorn every worker writes its samples to
+PROMETHEUS_MULTIPROC_DIR (set up in gunicorn_conf.py) and /metrics
+merges them, without it the in-process registry is served
+"""
+import os
+import time
+from functools import wraps
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['method', 'route'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Responses by route and status',
+    ['method', 'route', 'status'],
+)
+DB_QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds', 'Database call latency by databases method',
+    ['operation'], buckets=LATENCY_BUCKETS,
+)
+SYNC_ROWS = Counter(
+    'wms_sync_rows_total', 'Products written by the WMS sync',
+    ['result'],
+)
+SYNC_PAGES = Counter('wms_sync_pages_total', 'WMS pages written by the sync')
+UPSTREAM_LATENCY = Histogram(
+    'upstream_request_duration_seconds', 'Outbound call latency by upstream and status',
+    ['upstream', 'status'], buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    'upstream_errors_total', 'Failed outbound calls by upstream and reason, retries included',
+    ['upstream', 'reason'],
+)
+QUEUE_WAIT = Histogram(
+    'http_queue_wait_seconds', 'Time spent waiting for a concurrency slot by route',
+    ['route'], buckets=LATENCY_BUCKETS,
+)
+SHED_REQUESTS = Counter(
+    'http_shed_requests_total', 'Requests rejected by load shedding by route and status',
+    ['route', 'status'],
+)
+
+UNMATCHED = 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware, the route label is the path template of the
+    matched route so ids in paths don't blow up cardinality
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+        self._children = {}
+
+    def _route(self, scope) -> str:
+        if self._routes is None:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope['app'].routes if hasattr(route, 'endpoint')
+            }
+        return self._routes.get(scope.get('endpoint'), UNMATCHED)
+
+    def _observe(self, method: str, route: str, status: int, elapsed: float):
+        key = (method, route, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                REQUEST_LATENCY.labels(method, route),
+                REQUESTS.labels(method, route, str(status)),
+            )
+        children[0].observe(elapsed)
+        children[1].inc()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._observe(scope['method'], self._route(scope), status, time.perf_counter() - started)
+
+
+def instrument_database(db):
+    """
+    Time every query method of a databases.Database instance
+    """
+    for operation in ('execute', 'execute_many', 'fetch_all', 'fetch_one', 'fetch_val'):
+        method = getattr(db, operation)
+        histogram = DB_QUERY_LATENCY.labels(operation)
+
+        def timed(method=method, histogram=histogram):
+            @wraps(method)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+            return wrapper
+
+        setattr(db, operation, timed())
+
+
+def track_sync_page(written: dict):
+    SYNC_PAGES.inc()
+    for result, count in written.items():
+        SYNC_ROWS.labels(result).inc(count)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
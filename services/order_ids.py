@@ -0,0 +1,47 @@
+import asyncio
+import datetime
+from typing import List
+
+from models.database import database
+from models.order import ORDER_ID_BLOCK, order_id_seq
+
+
+class OrderIdAllocator:
+    """
+    Hands out yymmdd-NNNNNN order ids from a block of order_id_seq values
+    reserved by this worker, so Postgres is hit once per ORDER_ID_BLOCK ids.
+    The number alone is unique across workers, the date is only for humans
+    """
+
+    def __init__(self, block: int = ORDER_ID_BLOCK):
+        self.block = block
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def _refill(self):
+        async with self._lock:
+            if self._next < self._end:
+                return
+            start = await database.fetch_val(order_id_seq.next_value().select())
+            self._next, self._end = start, start + self.block
+
+    async def allocate_many(self, count: int) -> List[str]:
+        prefix = datetime.date.today().strftime('%y%m%d')
+        ids = []
+        while len(ids) < count:
+            while self._next >= self._end:
+                await self._refill()
+            # no await between the check and the increment
+            ids.append(f'{prefix}-{self._next:06d}')
+            self._next += 1
+        return ids
+
+    async def allocate(self) -> str:
+        if self._next >= self._end:
+            return (await self.allocate_many(1))[0]
+        value, self._next = self._next, self._next + 1
+        return f"{datetime.date.today().strftime('%y%m%d')}-{value:06d}"
+
+
+order_ids = OrderIdAllocator()
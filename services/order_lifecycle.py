@@ -0,0 +1,88 @@
+from typing import Optional
+
+from models.database import database
+from models.order import orders
+from shemas.shemas_order_cycle import OrderResolution, OrderStatus
+
+# statuses in delivery order, closed is final
+ORDER_FLOW = [
+    OrderStatus.created,
+    OrderStatus.assembling,
+    OrderStatus.assembled,
+    OrderStatus.performer_found,
+    OrderStatus.delivering,
+    OrderStatus.delivery_arrived,
+    OrderStatus.closed,
+]
+OPEN_STATUSES = [order_status.value for order_status in ORDER_FLOW[:-1]]
+# an order can't be canceled once a courier took it
+CANCELABLE_STATUSES = OPEN_STATUSES[:ORDER_FLOW.index(OrderStatus.performer_found)]
+
+# event -> (statuses it is allowed from, columns it sets)
+TRANSITIONS = {
+    'cancel': (CANCELABLE_STATUSES, {
+        'status': OrderStatus.closed.value, 'resolution': OrderResolution.canceled.value,
+    }),
+    'payment_fail': (CANCELABLE_STATUSES, {
+        'status': OrderStatus.closed.value, 'resolution': OrderResolution.failed.value, 'payment_status': 'fail',
+    }),
+    'payment_success': (OPEN_STATUSES, {
+        'payment_status': 'success',
+    }),
+}
+
+# The row is locked in the subquery, so `old` is the status the update
+# actually replaced even when a concurrent transition got there first.
+# The transition is logged by the same statement
+TRANSITION_SQL = """
+WITH moved AS (
+    UPDATE orders SET
+        status = COALESCE(:status, orders.status),
+        resolution = COALESCE(:resolution, orders.resolution),
+        payment_status = COALESCE(:payment_status, orders.payment_status),
+        updated_at = now()
+    FROM (SELECT order_id, status FROM orders WHERE order_id = :order_id FOR UPDATE) AS old
+    WHERE orders.order_id = old.order_id AND old.status = ANY(CAST(:allowed AS text[]))
+    RETURNING orders.order_id, old.status AS from_status, orders.status AS to_status, orders.resolution
+)
+INSERT INTO order_transitions (order_id, event, from_status, to_status, resolution)
+SELECT order_id, :event, from_status, to_status, resolution FROM moved
+RETURNING to_status
+"""
+
+
+class TransitionError(Exception):
+    pass
+
+
+class OrderNotFound(TransitionError):
+    pass
+
+
+async def transition(order_id: str, event: str) -> str:
+    """
+    Apply `event` to the order in one round trip, returns the new status.
+    Raises OrderNotFound or TransitionError when the order is in a status
+    the event is not allowed from
+    """
+    allowed, values = TRANSITIONS[event]
+    to_status: Optional[str] = await database.fetch_val(
+        query=TRANSITION_SQL,
+        values={
+            'order_id': order_id,
+            'event': event,
+            'allowed': allowed,
+            'status': values.get('status'),
+            'resolution': values.get('resolution'),
+            'payment_status': values.get('payment_status'),
+        },
+    )
+    if to_status is not None:
+        return to_status
+    # cold path, only to tell the caller why
+    current = await database.fetch_val(
+        orders.select().with_only_columns([orders.c.status]).where(orders.c.order_id == order_id)
+    )
+    if current is None:
+        raise OrderNotFound(order_id)
+    raise TransitionError(f'Order {order_id} is {current}, {event} is not allowed')
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Optional
+
+from conf.config import settings
+from models.database import database
+from services.order_lifecycle import ORDER_FLOW
+from shemas.shemas_order_cycle import OrderResolution, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+# any constant shared by all workers, only one of them runs a tick at a time
+SIMULATOR_LOCK = 0x6f726473
+
+# Every due order moves one step in a single statement. The transaction
+# level advisory lock is taken in the `flow` CTE, workers that don't get it
+# see an empty flow and update nothing
+TICK_SQL = """
+WITH flow AS (
+    SELECT * FROM unnest(
+        CAST(:from_status AS text[]), CAST(:to_status AS text[]), CAST(:after_sec AS float8[])
+    ) AS flow(from_status, to_status, after_sec)
+    WHERE pg_try_advisory_xact_lock(:lock)
+),
+moved AS (
+    UPDATE orders SET
+        status = flow.to_status,
+        resolution = CASE WHEN flow.to_status = :closed THEN :succeeded ELSE orders.resolution END,
+        updated_at = now()
+    FROM flow
+    WHERE orders.status = flow.from_status
+        AND orders.updated_at <= now() - make_interval(secs => flow.after_sec)
+    RETURNING orders.order_id, flow.from_status, orders.status AS to_status, orders.resolution
+),
+logged AS (
+    INSERT INTO order_transitions (order_id, event, from_status, to_status, resolution)
+    SELECT order_id, 'simulate', from_status, to_status, resolution FROM moved
+    RETURNING 1
+)
+SELECT count(*) FROM logged
+"""
+
+
+class OrderSimulator:
+    """
+    Advances open orders along ORDER_FLOW, an order stays in a status
+    for settings.simulator_timings[status] seconds
+    """
+
+    def __init__(self, tick_sec: float, timings: dict):
+        self.tick_sec = tick_sec
+        steps = list(zip(ORDER_FLOW, ORDER_FLOW[1:]))
+        self.values = {
+            'from_status': [from_status.value for from_status, _ in steps],
+            'to_status': [to_status.value for _, to_status in steps],
+            'after_sec': [float(timings.get(from_status.value, 60)) for from_status, _ in steps],
+            'lock': SIMULATOR_LOCK,
+            'closed': OrderStatus.closed.value,
+            'succeeded': OrderResolution.succeeded.value,
+        }
+        self.moved = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def tick(self) -> int:
+        async with database.transaction():
+            moved = await database.fetch_val(query=TICK_SQL, values=self.values)
+        self.moved += moved
+        if moved:
+            logger.info('Order simulator moved %s orders', moved, extra={'moved': moved})
+        return moved
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.tick_sec)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception('Order simulator tick failed')
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+order_simulator = OrderSimulator(settings.simulator_tick_sec, settings.simulator_timings)
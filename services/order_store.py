@@ -0,0 +1,62 @@
+from typing import Iterable, Tuple
+
+from models.database import database
+from models.order import order_cart_items, order_headers
+from shemas.shemas_order_cycle import Numeric, RequestOrder
+
+HEADER_COLUMNS = [column.name for column in order_headers.columns]
+CART_ITEM_COLUMNS = [column.name for column in order_cart_items.columns]
+LOCATION_FIELDS = HEADER_COLUMNS[HEADER_COLUMNS.index('place_id'):]
+
+
+def header_record(order_id: str, order: RequestOrder) -> tuple:
+    location = order.location
+    cart = order.cart
+    return (
+        order_id,
+        order.user_id,
+        order.user_phone,
+        order.payment_type.value,
+        order.use_external_delivery,
+        Numeric.to_decimal(cart.cart_total_cost),
+        Numeric.to_decimal(cart.cart_total_discount),
+        Numeric.to_decimal(cart.delivery_fee),
+        location.position.lat,
+        location.position.lon,
+        *(getattr(location, field) for field in LOCATION_FIELDS),
+    )
+
+
+def cart_item_records(order_id: str, order: RequestOrder):
+    for position, item in enumerate(order.cart.items):
+        yield (
+            order_id,
+            position,
+            item.id,
+            Numeric.to_decimal(item.quantity),
+            Numeric.to_decimal(item.full_price),
+            Numeric.to_decimal(item.stack_price),
+            Numeric.to_decimal(item.stack_full_price),
+            item.title,
+        )
+
+
+async def save_order_details(created: Iterable[Tuple[str, RequestOrder]]):
+    """
+    Headers and cart items of freshly created orders, two binary COPYs
+    whatever the number of orders and items. Call it inside the
+    transaction that created the orders, it runs on the same connection
+    """
+    created = list(created)
+    if not created:
+        return
+    async with database.connection() as connection:
+        raw = connection.raw_connection
+        await raw.copy_records_to_table(
+            order_headers.name,
+            records=[header_record(order_id, order) for order_id, order in created],
+            columns=HEADER_COLUMNS,
+        )
+        items = [record for order_id, order in created for record in cart_item_records(order_id, order)]
+        if items:
+            await raw.copy_records_to_table(order_cart_items.name, records=items, columns=CART_ITEM_COLUMNS)
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import asyncpg
+import orjson
+from sqlalchemy import String, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from conf.config import settings
+from models.database import DATABASE_URL, database
+from models.product import products
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS_CHANNEL = 'products_changed'
+LISTEN_RETRY_MAX_SEC = 30
+# NOTIFY payloads are limited to 8000 bytes, bigger changes drop the whole cache
+NOTIFY_PAYLOAD_LIMIT = 7000
+
+
+async def notify_products_changed(product_ids: List[str]):
+    """
+    Delivered to every worker when the surrounding transaction commits
+    """
+    # a JSON array survives ids with commas, the limit is in bytes
+    payload = orjson.dumps(product_ids)
+    payload = '*' if len(payload) > NOTIFY_PAYLOAD_LIMIT else payload.decode()
+    await database.execute(
+        query='SELECT pg_notify(:channel, :payload)',
+        values={'channel': PRODUCTS_CHANNEL, 'payload': payload},
+    )
+
+
+class ProductCache:
+    """
+    Per-worker bidirectional product_id <-> external_id index with LRU eviction.
+    The cache is only used while the LISTEN connection is alive,
+    otherwise every lookup goes to Postgres. Lookups only fill the cache
+    if no invalidation came in while their query was in flight
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.by_product: OrderedDict = OrderedDict()
+        self.by_external: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._listener: Optional[asyncpg.Connection] = None
+        self._reconnect: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self._listener is not None and not self._listener.is_closed()
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'size': len(self.by_product),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+    def _put(self, product_id: str, external_id: str):
+        old = self.by_product.pop(product_id, None)
+        if old is not None and self.by_external.get(old) == product_id:
+            del self.by_external[old]
+        self.by_product[product_id] = external_id
+        self.by_external[external_id] = product_id
+        while len(self.by_product) > self.maxsize:
+            evicted_id, evicted_external = self.by_product.popitem(last=False)
+            if self.by_external.get(evicted_external) == evicted_id:
+                del self.by_external[evicted_external]
+
+    def invalidate(self, product_ids: Iterable[str] = None):
+        self.invalidations += 1
+        if product_ids is None:
+            self.by_product.clear()
+            self.by_external.clear()
+            return
+        for product_id in product_ids:
+            external_id = self.by_product.pop(product_id, None)
+            if external_id is not None and self.by_external.get(external_id) == product_id:
+                del self.by_external[external_id]
+
+    async def external_id(self, product_id: str) -> Optional[str]:
+        if self.enabled and product_id in self.by_product:
+            self.hits += 1
+            self.by_product.move_to_end(product_id)
+            return self.by_product[product_id]
+        self.misses += 1
+        generation = self.invalidations
+        row = await database.fetch_one(
+            products.select().where(products.c.product_id == product_id)
+        )
+        if row is None:
+            return None
+        if self.enabled and generation == self.invalidations:
+            self._put(row['product_id'], row['external_id'])
+        return row['external_id']
+
+    async def product_ids(self, external_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        external_id -> product_id for every known id, misses are loaded in one query
+        """
+        found = {}
+        missing = []
+        enabled = self.enabled
+        for external_id in external_ids:
+            product_id = self.by_external.get(external_id) if enabled else None
+            if product_id is None:
+                missing.append(external_id)
+            else:
+                self.by_product.move_to_end(product_id)
+                found[external_id] = product_id
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            generation = self.invalidations
+            # one array parameter keeps the statement text stable for the prepared statement cache
+            rows = await database.fetch_all(
+                products.select().where(products.c.external_id == any_(
+                    bindparam('external_ids', value=missing, type_=ARRAY(String))
+                ))
+            )
+            # a NOTIFY during the query may be about rows read before the commit
+            enabled = enabled and self.enabled and generation == self.invalidations
+            for row in rows:
+                found[row['external_id']] = row['product_id']
+                if enabled:
+                    self._put(row['product_id'], row['external_id'])
+        return found
+
+    async def product_id(self, external_id: str) -> Optional[str]:
+        return (await self.product_ids([external_id])).get(external_id)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.invalidate(None if payload == '*' else orjson.loads(payload))
+
+    def _on_terminate(self, connection):
+        # notifications may have been missed while disconnected
+        self.invalidate()
+        self._listener = None
+        self.start()
+
+    def start(self):
+        """
+        Connect the LISTEN connection in the background, lookups skip the
+        cache until it is up so a busy Postgres doesn't hold up the worker
+        """
+        if self.maxsize > 0:
+            self._reconnect = asyncio.get_running_loop().create_task(self.listen())
+
+    async def listen(self):
+        if self.maxsize <= 0:
+            return
+        delay = 1
+        while self._listener is None:
+            try:
+                listener = await asyncpg.connect(DATABASE_URL)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning('Product cache LISTEN connection failed, cache is off', extra={
+                    'error': repr(exc), 'retry_sec': delay,
+                })
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LISTEN_RETRY_MAX_SEC)
+                continue
+            try:
+                await listener.add_listener(PRODUCTS_CHANNEL, self._on_notify)
+            except BaseException:
+                await listener.close()
+                raise
+            listener.add_termination_listener(self._on_terminate)
+            self._listener = listener
+            logger.info('Product cache LISTEN connection is up')
+
+    async def close(self):
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            listener.remove_termination_listener(self._on_terminate)
+            await listener.close()
+        self.invalidate()
+
+
+product_cache = ProductCache(settings.product_cache_size)
@@ -0,0 +1,15 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class PreparedJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, bytes are sent as they are.
+    Returning it from a route skips response_model validation and
+    jsonable_encoder, the route's OpenAPI schema is not affected
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
@@ -1,6 +1,25 @@
-from pydantic import BaseModel
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
 
 
 class Product(BaseModel):
     product_id: str
     external_id: str
+
+
+class JobStatus(BaseModel):
+    id: str
+    name: str
+    status: str
+    pages: int
+    rows: int
+    created: int
+    updated: int
+    error: Optional[str]
+    started_at: datetime.datetime
+    heartbeat_at: datetime.datetime
+    finished_at: Optional[datetime.datetime]
+    rows_per_sec: Optional[float] = Field(description='Average write throughput')
+    eta_sec: Optional[float] = Field(description='Estimated from the size of the last finished run')
@@ -1,26 +1,37 @@
 import datetime
 import re
+from decimal import Decimal
 from enum import Enum
 from typing import List
 from typing import Optional
+from typing import Union
 
-from pydantic import BaseModel, validator, constr, Field, conint
+from pydantic import BaseModel, validator, constr, Field, conint, conlist
 
 
 class Numeric(str):
     pattern = r'^\d+(\.\d*)?$'
+    _match = re.compile(pattern).match
 
     @classmethod
     def validate(cls, v):
         if not isinstance(v, str):
             raise ValueError(f'str expected, got{type(v)}')
-        if not re.match(pattern=cls.pattern, string=v):
+        if cls._match(v) is None:
             raise ValueError(f'Wrong value {v} for pattern {cls.pattern}')
+        return v
 
     @classmethod
     def __get_validators__(cls):
         yield cls.validate
 
+    @staticmethod
+    def to_decimal(v: Optional[str]) -> Optional[Decimal]:
+        """
+        Numeric fields stay strings, convert only where the math is needed
+        """
+        return None if v is None else Decimal(v)
+
 
 class CartItem(BaseModel):
     """
@@ -40,10 +51,42 @@ class CartItem(BaseModel):
 
 class Cart(BaseModel):
     items: List[CartItem] = Field(description='Items in a cart')
-    cart_total_cost: Optional[Numeric] = Field(description='Total cost', title='Basically Decimal <4>')
-    cart_total_discount: Optional[Numeric] = Field(description='Total discount', title='Basically Decimal <4>')
+    cart_total_cost: Optional[Numeric] = Field(
+        description='Total cost after discounts: the sum of stack_price, '
+                    'quantity * full_price for items without one',
+        title='Basically Decimal <4>'
+    )
+    cart_total_discount: Optional[Numeric] = Field(
+        description='Total discount, informational, already included in the stack prices',
+        title='Basically Decimal <4>'
+    )
     delivery_fee: Optional[Numeric] = Field(description='Delivery cost', title='Basically Decimal <4>')
 
+    @staticmethod
+    def items_total(items: List[CartItem]) -> Decimal:
+        """
+        Sum of stack prices, quantity * full_price for items without one
+        """
+        total = Decimal(0)
+        for item in items:
+            if item.stack_price is not None:
+                total += Decimal(item.stack_price)
+            else:
+                total += Decimal(item.quantity) * Decimal(item.full_price)
+        return total
+
+    @validator('cart_total_cost')
+    def total_matches_items(cls, cart_total_cost, values):
+        """
+        Discounts are already in stack_price, cart_total_discount is not subtracted
+        """
+        if cart_total_cost is None or 'items' not in values:
+            return cart_total_cost
+        total = cls.items_total(values['items'])
+        if Decimal(cart_total_cost) != total:
+            raise ValueError(f'cart_total_cost {cart_total_cost} does not match items total {total}')
+        return cart_total_cost
+
 
 class PaymentType(str, Enum):
     cash = 'cash'
@@ -110,6 +153,16 @@ class OrderValidationError(BaseModel):
     details: OrderValidationErrorDetails
 
 
+class BatchRequestOrder(BaseModel):
+    orders: conlist(RequestOrder, min_items=1, max_items=500) = Field(description='Orders to create')
+
+
+class BatchOrderResponse(BaseModel):
+    results: List[Union[OrderResponce, OrderValidationError]] = Field(
+        description='Result for every order, in request order, repeated created_order_id get the same order'
+    )
+
+
 class DeliveryType(str, Enum):
     courier = 'courier'
     pickup = 'pickup'
@@ -134,7 +187,7 @@ class OrderResolution(str, Enum):
 
 class OrdersStateRequest(BaseModel):
     user_id: Optional[str]
-    known_orders: List[str]
+    known_orders: conlist(str, max_items=500)
 
 
 class OrderActionType(str, Enum):
@@ -0,0 +1,45 @@
+import asyncio
+
+from app import app
+from benchmarks.asgi import call
+from benchmarks.payloads import orders_state_request, request_order
+
+SUBMIT = '/lavka/v1/integration-entry/v1/order/submit'
+STATE = '/lavka/v1/integration-entry/v1/order/state'
+BATCH = '/lavka/v1/integration-entry/v1/order/submit-batch'
+
+
+def post(path: str, body: dict):
+    return asyncio.run(call(app, 'POST', path, body))
+
+
+def assert_bad_request(status: int, body: dict):
+    assert status == 400
+    assert body['code'] == 'bad_request'
+    assert isinstance(body['message'], str)
+    assert body['details']['cart'] is None
+    assert body['details']['retry_after'] >= 1
+
+
+def test_invalid_body_gets_error_envelope():
+    order = request_order()
+    order['location']['position']['lat'] = 'north'
+    assert_bad_request(*post(SUBMIT, order))
+
+
+def test_cart_total_mismatch_is_bad_request():
+    order = request_order()
+    order['cart']['cart_total_cost'] = '0.01'
+    assert_bad_request(*post(SUBMIT, order))
+
+
+def test_too_many_known_orders_is_bad_request():
+    assert_bad_request(*post(STATE, orders_state_request(501)))
+
+
+def test_empty_batch_is_bad_request():
+    assert_bad_request(*post(BATCH, {'orders': []}))
+
+
+def test_oversized_batch_is_bad_request():
+    assert_bad_request(*post(BATCH, {'orders': [request_order(1) for _ in range(501)]}))
@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiohttp
+import pytest
+
+from conf.config import settings
+from routers import jobs
+from services.http_client import http_client
+from tests.wms_stub import WmsStub, serve
+
+
+class Writer:
+    """
+    Stands in for the database side of the sync, records what it is given
+    """
+
+    def __init__(self, fail_on_page: int = None):
+        self.pages = []
+        self.cursors = []
+        self.fail_on_page = fail_on_page
+        # set to an Event to hold writes until it is set
+        self.release = None
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def upsert_products(self, rows):
+        if self.release is not None:
+            await self.release.wait()
+        if self.fail_on_page is not None and len(self.pages) + 1 == self.fail_on_page:
+            raise RuntimeError('write failed')
+        self.pages.append([row['product_id'] for row in rows])
+        return {'created': len(rows), 'updated': 0, 'unchanged': 0}
+
+    async def save_sync_cursor(self, name, cursor):
+        self.cursors.append(cursor)
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = Writer()
+    monkeypatch.setattr(jobs, 'upsert_products', writer.upsert_products)
+    monkeypatch.setattr(jobs, 'save_sync_cursor', writer.save_sync_cursor)
+    monkeypatch.setattr(jobs.database, 'transaction', writer.transaction)
+    return writer
+
+
+@asynccontextmanager
+async def wms(monkeypatch, stub: WmsStub):
+    async with serve(stub) as url:
+        monkeypatch.setattr(settings, 'wms_url', url)
+        await http_client.start()
+        try:
+            yield
+        finally:
+            await http_client.close()
+
+
+def test_walks_every_cursor_page(monkeypatch, writer):
+    stub = WmsStub(pages=3)
+
+    async def run():
+        async with wms(monkeypatch, stub):
+            return await jobs.sync_product_from_wms(full=True)
+
+    stats = asyncio.run(run())
+    assert stub.cursors == ['1', '2', '3']
+    assert writer.pages == [[p['product_id'] for p in stub.products(page)] for page in (1, 2, 3)]
+    # the last page has no cursor, the next run resumes from it
+    assert writer.cursors == ['2', '3', '3']
+    assert stats == {'created': 9, 'updated': 0, 'unchanged': 0}
+
+
+def test_fetching_stops_at_prefetch_pages(monkeypatch, writer):
+    stub = WmsStub(pages=10)
+    prefetch = 2
+
+    async def run():
+        writer.release = asyncio.Event()
+        async with wms(monkeypatch, stub):
+            sync = asyncio.create_task(jobs.sync_product_from_wms(prefetch=prefetch, full=True))
+            await asyncio.sleep(0.5)
+            # one page being written, `prefetch` queued and one held by the blocked producer
+            fetched = len(stub.cursors)
+            writer.release.set()
+            await sync
+            return fetched
+
+    assert asyncio.run(run()) == prefetch + 2
+    assert len(writer.pages) == 10
+
+
+def test_fetch_error_reaches_writer(monkeypatch, writer):
+    stub = WmsStub(pages=5, fail={3: 400})
+
+    async def run():
+        async with wms(monkeypatch, stub):
+            await jobs.sync_product_from_wms(full=True)
+
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        asyncio.run(run())
+    assert error.value.status == 400
+    # pages before the failure are written and their cursors saved
+    assert len(writer.pages) == 2
+    assert writer.cursors == ['2', '3']
+
+
+def test_writer_failure_cancels_producer(monkeypatch, writer):
+    stub = WmsStub(pages=100)
+    writer.fail_on_page = 1
+    producers = []
+    fetch_wms_pages = jobs.fetch_wms_pages
+
+    async def tracked(queue, cursor):
+        producers.append(asyncio.current_task())
+        await fetch_wms_pages(queue, cursor)
+
+    monkeypatch.setattr(jobs, 'fetch_wms_pages', tracked)
+
+    prefetch = 1
+
+    async def run():
+        async with wms(monkeypatch, stub):
+            with pytest.raises(RuntimeError):
+                await jobs.sync_product_from_wms(prefetch=prefetch, full=True)
+            # a request cancelled in flight may still reach the stub afterwards
+            await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+    assert producers[0].cancelled()
+    # the page being written, `prefetch` queued and one in flight at most
+    assert len(stub.cursors) <= prefetch + 2
@@ -0,0 +1,52 @@
+"""
+Local aiohttp stub of the WMS products feed
+"""
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+PRODUCTS_PATH = '/api/external/products/v1/products'
+
+
+class WmsStub:
+    """
+    Serves `pages` cursor pages, page n is requested with cursor str(n + 1)
+    and points to the next one, the last page has no cursor.
+    A status in `fail` answers that page with an error instead
+    """
+
+    def __init__(self, pages: int, page_size: int = 3, fail: dict = None):
+        self.pages = pages
+        self.page_size = page_size
+        self.fail = fail or {}
+        self.cursors = []
+
+    def products(self, page: int) -> list:
+        return [
+            {'product_id': f'p{page}-{i}', 'external_id': f'e{page}-{i}'}
+            for i in range(self.page_size)
+        ]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.cursors.append(body['cursor'])
+        page = int(body['cursor'])
+        if page in self.fail:
+            return web.json_response({'code': 'error', 'message': 'stub failure'}, status=self.fail[page])
+        answer = {'products': self.products(page)}
+        if page < self.pages:
+            answer['cursor'] = str(page + 1)
+        return web.json_response(answer)
+
+
+@asynccontextmanager
+async def serve(stub: WmsStub):
+    app = web.Application()
+    app.router.add_post(PRODUCTS_PATH, stub.handle)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        yield str(server.make_url('')).rstrip('/')
+    finally:
+        await server.close()